@@ -181,4 +181,87 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-CORS_ALLOW_ALL_ORIGINS = True  
\ No newline at end of file
+CORS_ALLOW_ALL_ORIGINS = True
+
+# Diabetes care
+PREDICT_BATCH_MAX_ROWS = env.int('PREDICT_BATCH_MAX_ROWS', default=10000)
+
+# Model artifacts load on first use. MODEL_WARMUP loads them when the WSGI/ASGI
+# application starts; MODEL_RELOAD_INTERVAL is how often (in seconds) the files
+# are checked for changes and hot-reloaded, 0 disables the check.
+MODEL_WARMUP = env.bool('MODEL_WARMUP', default=False)
+MODEL_RELOAD_INTERVAL = env.float('MODEL_RELOAD_INTERVAL', default=5.0)
+
+# Opt-in micro-batching of concurrent /api/predict/ requests: requests are held for
+# up to PREDICT_BATCH_WINDOW_MS or until PREDICT_BATCH_MAX_SIZE are waiting, then
+# scored with one model call.
+PREDICT_BATCHING = env.bool('PREDICT_BATCHING', default=False)
+PREDICT_BATCH_WINDOW_MS = env.float('PREDICT_BATCH_WINDOW_MS', default=2.0)
+PREDICT_BATCH_MAX_SIZE = env.int('PREDICT_BATCH_MAX_SIZE', default=64)
+
+# Per-process LRU cache of /api/predict/ results keyed on the inputs and model version.
+# PREDICT_CACHE_SIZE=0 disables it; PREDICT_CACHE_TTL is in seconds, 0 for no expiry.
+# Batcher and cache counters are served at /api/predict/metrics/.
+PREDICT_CACHE_SIZE = env.int('PREDICT_CACHE_SIZE', default=10000)
+PREDICT_CACHE_TTL = env.float('PREDICT_CACHE_TTL', default=3600.0)
+
+# Optional process pool for prediction and recommendation scoring. Each pool process
+# loads the models once; when INFERENCE_MAX_PENDING jobs are in flight new requests
+# get a 503. INFERENCE_WORKERS=0 uses one process per CPU.
+INFERENCE_EXECUTOR = env.bool('INFERENCE_EXECUTOR', default=False)
+INFERENCE_WORKERS = env.int('INFERENCE_WORKERS', default=0)
+INFERENCE_MAX_PENDING = env.int('INFERENCE_MAX_PENDING', default=64)
+INFERENCE_TIMEOUT = env.float('INFERENCE_TIMEOUT', default=10.0)
+INFERENCE_START_METHOD = env('INFERENCE_START_METHOD', default='spawn')
+
+# Serve prediction, alternative-medicine, drug-suggestion and glucose endpoints with
+# native async views (diabetescare/async_views.py). Only useful under config.asgi.
+ASYNC_VIEWS = env.bool('ASYNC_VIEWS', default=False)
+
+# Alternative medicine recommendations: the precomputed neighbour table holds the top
+# ALTERNATIVE_MEDICINE_TOP_K drugs per entry; larger k (up to ALTERNATIVE_MEDICINE_MAX_K)
+# is ranked from the similarity row on request.
+ALTERNATIVE_MEDICINE_TOP_K = env.int('ALTERNATIVE_MEDICINE_TOP_K', default=20)
+ALTERNATIVE_MEDICINE_MAX_K = env.int('ALTERNATIVE_MEDICINE_MAX_K', default=50)
+# Render every drug's default recommendation response to JSON when the catalog loads and
+# serve those bytes directly; GET responses carry the catalog ETag and support 304s
+ALTERNATIVE_MEDICINE_PRERENDER = env.bool('ALTERNATIVE_MEDICINE_PRERENDER', default=False)
+# Cache-Control of GET /api/alternative-medicine/ and /api/drug-suggestions/ responses. Their
+# ETag follows the catalog version, so caches revalidate after a catalog update. The catalog
+# is the same for every user; use 'private, ...' to keep shared caches from storing it.
+CATALOG_CACHE_CONTROL = env('CATALOG_CACHE_CONTROL', default='public, max-age=3600')
+# Largest drug list accepted by /api/alternative-medicine/batch/
+ALTERNATIVE_MEDICINE_BATCH_MAX_DRUGS = env.int('ALTERNATIVE_MEDICINE_BATCH_MAX_DRUGS', default=100)
+
+# Page size bounds for /api/drug-suggestions/ (limit and offset parameters)
+DRUG_SUGGESTIONS_DEFAULT_LIMIT = env.int('DRUG_SUGGESTIONS_DEFAULT_LIMIT', default=20)
+DRUG_SUGGESTIONS_MAX_LIMIT = env.int('DRUG_SUGGESTIONS_MAX_LIMIT', default=100)
+DRUG_SUGGESTIONS_MAX_OFFSET = env.int('DRUG_SUGGESTIONS_MAX_OFFSET', default=10000)
+
+# PatientProfile.medical_history lists every glucose reading by default, or only the newest
+# MEDICAL_HISTORY_MAX_READINGS. Adding a reading appends one line either way; the limit also
+# bounds the rebuild a backdated reading causes, at the cost of older lines disappearing
+# from the history doctors see.
+MEDICAL_HISTORY_MAX_READINGS = env.int('MEDICAL_HISTORY_MAX_READINGS', default=0)
+
+# /api/glucose/add/bulk/: readings accepted per request and rows per INSERT statement
+GLUCOSE_BULK_MAX_READINGS = env.int('GLUCOSE_BULK_MAX_READINGS', default=2000)
+GLUCOSE_BULK_BATCH_SIZE = env.int('GLUCOSE_BULK_BATCH_SIZE', default=500)
+
+# Keyset pagination of /api/glucose/list/, /api/my-analysis/ and /api/patient-analysis/<id>/
+# (limit, before and after parameters; see diabetescare/pagination.py). LIST_PAGE_SIZE is
+# the page size of cursor requests without a limit; requests with no paging parameter at
+# all still get the full listing.
+LIST_PAGE_SIZE = env.int('LIST_PAGE_SIZE', default=50)
+LIST_MAX_PAGE_SIZE = env.int('LIST_MAX_PAGE_SIZE', default=200)
+
+# /api/glucose/statistics/: target range in mg/dL for time in/below/above range, the
+# window used when no start date is given and the longest window accepted
+GLUCOSE_TARGET_LOW = env.float('GLUCOSE_TARGET_LOW', default=70.0)
+GLUCOSE_TARGET_HIGH = env.float('GLUCOSE_TARGET_HIGH', default=180.0)
+GLUCOSE_STATISTICS_DEFAULT_DAYS = env.int('GLUCOSE_STATISTICS_DEFAULT_DAYS', default=14)
+GLUCOSE_STATISTICS_MAX_DAYS = env.int('GLUCOSE_STATISTICS_MAX_DAYS', default=366)
+# Answer /api/glucose/statistics/ from the daily glucose rollups, a row per patient, type
+# and day, instead of the readings. Enable after filling the rollups of existing readings
+# with 'manage.py rebuild_glucose_rollups'; new readings keep them up to date.
+GLUCOSE_STATISTICS_FROM_ROLLUPS = env.bool('GLUCOSE_STATISTICS_FROM_ROLLUPS', default=False)
@@ -1,42 +1,331 @@
+import json
+import logging
 import pickle
-import pandas as pd
 import os
+import sys
+import numpy as np
+from bisect import bisect_left, bisect_right
+from django.conf import settings
+from .fuzzy import TrigramIndex
+from .registry import registry
 
 # Get the base directory of the Django project
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_DIR = os.path.join(BASE_DIR, "models", "alternative_medicine")
 
-# Load saved files
-try:
-    with open(os.path.join(BASE_DIR, "models", "alternative_medicine", "medicine_dict.pkl"), "rb") as file:
+logger = logging.getLogger(__name__)
+
+# Keys of each recommended drug in the API response and the catalog columns they come from
+response_fields = ("Drug Name", "Description", "Side Effects", "How to use with")
+record_columns = ("Drug Name", "Description", "Side Effects", "Uses")
+
+# Close matches listed with a "not found" error
+DID_YOU_MEAN_COUNT = 5
+# Recommendations returned when the request does not ask for a number
+DEFAULT_K = 5
+
+# Catalog columns saved under another name in medicine_dict.pkl
+column_aliases = {'                            How to use with ': 'How to use with'}
+
+def normalize_name(name):
+    return " ".join(name.casefold().split())
+
+# Drug catalog and similarity matrix, rebuilt together on reload. Columns are kept as
+# tuples; pandas is only imported when dataframe() is called.
+class Catalog:
+    def __init__(self, medicine_data, similarity, neighbors=None):
+        self.similarity = similarity
+
+        # Column name -> tuple of values in row order. Strings are interned, so the
+        # descriptions and side effects shared by many drugs are held once.
+        self.columns = {}
+        for column, values in medicine_data.items():
+            # Clean column name for use
+            column = column_aliases.get(column, column)
+            self.columns[column] = tuple(sys.intern(value) if isinstance(value, str) else value for value in values.values())
+        self.drug_names = self.columns['Drug Name']
+
+        # Name -> first row with that name, exact and normalised (see normalize_name),
+        # and name -> every row, since some names are listed more than once
+        drug_names = self.drug_names
+        self.name_index = {}
+        self.normalized_name_index = {}
+        self.name_rows = {}
+        for row, name in enumerate(drug_names):
+            self.name_index.setdefault(name, row)
+            self.normalized_name_index.setdefault(normalize_name(name), row)
+            self.name_rows.setdefault(name, []).append(row)
+
+        # Distinct names sorted by their lowercase form for bisect prefix search
+        prefix_entries = sorted({(name.lower(), name) for name in drug_names})
+        self.prefix_keys = [key for key, _ in prefix_entries]
+        self.prefix_names = [name for _, name in prefix_entries]
+
+        # Trigram index over the normalised names for typo-tolerant matching
+        self.fuzzy_index = TrigramIndex(self.normalized_name_index)
+        self.fuzzy_rows = list(self.normalized_name_index.values())
+
+        # JSON bodies of the default recommendations per row, see render_recommendations
+        self.rendered = None
+
+        # One tuple per drug holding the values of response_fields
+        self.records = tuple(zip(*(self.columns.get(column, ('N/A',) * len(drug_names)) for column in record_columns)))
+
+        # Top-k neighbour table: row i holds the first entries of rank_neighbors(similarity[i]),
+        # so entry 0 is the best match (usually the drug itself) and recommendations start at 1.
+        # A published catalog ships the table (see catalog_store); it is rebuilt when too narrow.
+        width = min(settings.ALTERNATIVE_MEDICINE_TOP_K + 1, len(self.similarity))
+        if neighbors is not None and neighbors[0].shape[1] >= width:
+            self.neighbor_indices = np.ascontiguousarray(neighbors[0][:, :width])
+            self.neighbor_scores = np.ascontiguousarray(neighbors[1][:, :width])
+        else:
+            self.neighbor_indices, self.neighbor_scores = build_neighbor_table(self.similarity, width)
+
+    # pandas view of the catalog for admin and analysis code; built on every call
+    def dataframe(self):
+        import pandas as pd
+        return pd.DataFrame(self.columns)
+
+    # Row of a drug name: exact match first, then case- and whitespace-insensitive
+    def lookup(self, drug_name):
+        index = self.name_index.get(drug_name)
+        if index is None:
+            index = self.normalized_name_index.get(normalize_name(drug_name))
+        return index
+
+    # Rows of names close to the query, best first (see fuzzy.TrigramIndex.search)
+    def fuzzy_lookup(self, query, prefix=False):
+        return [self.fuzzy_rows[key_id] for key_id in self.fuzzy_index.search(normalize_name(query), prefix)]
+
+    def drug_name(self, index):
+        return self.records[index][0]
+
+    def record(self, index):
+        return dict(zip(response_fields, self.records[index]))
+
+    # Range of prefix_keys starting with the lowercased query. Exact matches sort first.
+    def prefix_range(self, query):
+        prefix = query.lower()
+        start = bisect_left(self.prefix_keys, prefix)
+        end = bisect_right(self.prefix_keys, prefix, lo=start, key=lambda key: key[:len(prefix)])
+        return start, end
+
+    # Indices of the k drugs recommended for the drug at `index`
+    def neighbors(self, index, k):
+        if k < self.neighbor_indices.shape[1]:
+            return self.neighbor_indices[index, 1:k + 1]
+        return rank_neighbors(self.similarity[index], k + 1)[1:]
+
+# The `count` best entries of a similarity row, ordered by score descending and then by
+# index, which is the order the original sorted(enumerate(...), reverse=True) produced.
+# argpartition finds the cut-off score; every entry tied with it is kept so ties resolve
+# by index exactly as a full stable sort would.
+def rank_neighbors(scores, count):
+    scores = np.asarray(scores)
+    if count < len(scores):
+        cutoff = scores[np.argpartition(-scores, count - 1)[count - 1]]
+        candidates = np.flatnonzero(scores >= cutoff)
+    else:
+        candidates = np.arange(len(scores))
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order[:count]]
+
+def build_neighbor_table(similarity, width):
+    indices = np.empty((len(similarity), width), dtype=np.int32)
+    scores = np.empty((len(similarity), width), dtype=similarity.dtype)
+    for row, row_scores in enumerate(similarity):
+        top = rank_neighbors(row_scores, width)
+        indices[row] = top
+        scores[row] = row_scores[top]
+    return indices, scores
+
+# Memory-mapped similarity matrix written by 'manage.py convert_similarity'. Pages are
+# shared through the OS page cache by every worker. Returns None when the files are
+# missing or their row order no longer matches the catalog.
+def load_similarity_matrix(paths, drug_names):
+    if not (os.path.exists(paths["similarity_matrix"]) and os.path.exists(paths["similarity_index"])):
+        return None
+
+    with open(paths["similarity_index"], encoding="utf-8") as file:
+        index_names = json.load(file)
+    if index_names != list(drug_names):
+        logger.warning("%s does not match the drug catalog; run 'manage.py convert_similarity'.", paths["similarity_index"])
+        return None
+
+    return np.load(paths["similarity_matrix"], mmap_mode="r")
+
+# catalog.json, written by 'manage.py update_catalog', names the versioned directory
+# holding the current catalog files. Trees without it use the files in MODEL_DIR.
+def read_manifest(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+def manifest_paths(manifest_path, manifest):
+    directory = os.path.join(os.path.dirname(manifest_path), manifest["directory"])
+    return {role: os.path.join(directory, name) for role, name in manifest["files"].items()}
+
+# (medicine data, similarity matrix, neighbour table or None) of a published catalog
+def read_published_catalog(paths):
+    with open(paths["medicine_data"], "rb") as file:
         medicine_data = pickle.load(file)
-    with open(os.path.join(BASE_DIR, "models", "alternative_medicine", "similarity.pkl"), "rb") as file:
-        similarity = pickle.load(file)
-except FileNotFoundError:
-    raise FileNotFoundError("Medicine data or similarity file not found. Ensure 'medicine_dict.pkl' and 'similarity.pkl' are in the 'models/alternative_medicine' directory.")
 
-# Convert dict to DataFrame
-new_data = pd.DataFrame(medicine_data)
+    similarity = load_similarity_matrix(paths, medicine_data['Drug Name'].values())
+    if similarity is None:
+        raise ValueError(f"Published catalog in {os.path.dirname(paths['medicine_data'])} is incomplete.")
+
+    with np.load(paths["neighbors"]) as neighbors:
+        table = (neighbors["indices"], neighbors["scores"])
+    return medicine_data, similarity, table
+
+# The same from the original pickles in MODEL_DIR
+def read_unpublished_catalog(paths):
+    try:
+        with open(paths["medicine_data"], "rb") as file:
+            medicine_data = pickle.load(file)
+
+        similarity = load_similarity_matrix(paths, medicine_data['Drug Name'].values())
+        if similarity is None:
+            with open(paths["similarity"], "rb") as file:
+                similarity = pickle.load(file)
+    except FileNotFoundError:
+        raise FileNotFoundError("Medicine data or similarity file not found. Ensure 'medicine_dict.pkl' and 'similarity.pkl' are in the 'models/alternative_medicine' directory.")
+    return medicine_data, similarity, None
+
+def read_catalog(paths):
+    manifest = read_manifest(paths["manifest"])
+    if manifest is not None:
+        return read_published_catalog(manifest_paths(paths["manifest"], manifest))
+    return read_unpublished_catalog(paths)
+
+def load_catalog(paths):
+    catalog = Catalog(*read_catalog(paths))
+    if settings.ALTERNATIVE_MEDICINE_PRERENDER:
+        catalog.rendered = render_recommendations(catalog, DEFAULT_K)
+    return catalog
+
+catalog_paths = {
+    "medicine_data": os.path.join(MODEL_DIR, "medicine_dict.pkl"),
+    "similarity": os.path.join(MODEL_DIR, "similarity.pkl"),
+    "similarity_matrix": os.path.join(MODEL_DIR, "similarity.npy"),
+    "similarity_index": os.path.join(MODEL_DIR, "similarity_index.json"),
+    "manifest": os.path.join(MODEL_DIR, "catalog.json"),
+}
+registry.register("alternative_medicine", catalog_paths, load_catalog)
+
+# Loaded on first use; see registry.ModelRegistry
+def get_catalog():
+    return registry.get("alternative_medicine")
+
+# Version of the catalog files, for ETags. The registry swaps in a reloaded catalog before
+# its version, so reading the version first and the catalog second never pairs a new
+# version with an old catalog.
+def catalog_version():
+    return registry.version("alternative_medicine")
+
+# Row for a drug name and, when it was only found by fuzzy matching, that row again
+def resolve_drug(catalog, drug_name, fuzzy=False):
+    index = catalog.lookup(drug_name)
+    if index is None and fuzzy:
+        matches = catalog.fuzzy_lookup(drug_name)
+        if matches:
+            return matches[0], matches[0]
+    return index, None
 
-# Clean column name for use
-if '                            How to use with ' in new_data.columns:
-    new_data.rename(columns={'                            How to use with ': 'How to use with'}, inplace=True)
+def not_found(catalog, drug_name):
+    return {
+        "error": f"Drug '{drug_name}' not found in the database.",
+        "did_you_mean": [catalog.drug_name(row) for row in catalog.fuzzy_lookup(drug_name, prefix=True)[:DID_YOU_MEAN_COUNT]],
+    }
 
-# Recommendation function
-def recommend_info(drug_name):
-    if drug_name not in new_data['Drug Name'].values:
-        return {"error": f"Drug '{drug_name}' not found in the database."}
+def recommendations(catalog, indices, matched=None):
+    result = {"recommended_drugs": [catalog.record(i) for i in indices]}
+    if matched is not None:
+        result["matched_drug"] = catalog.drug_name(matched)
+    return result
 
-    index = new_data[new_data['Drug Name'] == drug_name].index[0]
-    distances = similarity[index]
-    top_indexes = sorted(list(enumerate(distances)), reverse=True, key=lambda x: x[1])[1:6]
+# Recommendation function. With fuzzy=True a misspelled name resolves to the closest
+# catalog name, reported back as "matched_drug".
+def recommend_info(drug_name, k=DEFAULT_K, fuzzy=False):
+    catalog = get_catalog()
+
+    index, matched = resolve_drug(catalog, drug_name, fuzzy)
+    if index is None:
+        return not_found(catalog, drug_name)
+
+    return recommendations(catalog, catalog.neighbors(index, k), matched)
+
+# The recommend_info response for every catalog row as UTF-8 JSON, encoded the way
+# DRF's JSONRenderer would (including its escaping of U+2028 and U+2029), so the view
+# can send it without building any objects
+def render_recommendations(catalog, k):
+    return [
+        json.dumps(recommendations(catalog, catalog.neighbors(index, k)), ensure_ascii=False, separators=(",", ":"))
+        .replace("\u2028", "\\u2028").replace("\u2029", "\\u2029").encode()
+        for index in range(len(catalog.records))
+    ]
+
+# Encoded body of a prerendered recommend_info response, or None when the catalog was
+# not prerendered, k is not the default or the name needs more than an exact lookup.
+def prerendered_recommendation(drug_name, k):
+    catalog = get_catalog()
+    if catalog.rendered is None or k != DEFAULT_K:
+        return None
+
+    index = catalog.lookup(drug_name)
+    if index is None:
+        return None
+    return catalog.rendered[index]
+
+# Recommendations for a list of drugs. The similarity rows of every resolved drug are
+# gathered with one fancy index when they are needed: for k beyond the neighbour table,
+# and for the merged ranking, which averages the rows and leaves out every row carrying
+# the name of a listed drug.
+def recommend_batch(drug_names, k=DEFAULT_K, merged=False, fuzzy=False):
+    catalog = get_catalog()
+
+    resolved = [resolve_drug(catalog, drug_name, fuzzy) for drug_name in drug_names]
+    indices = np.array([index for index, _ in resolved if index is not None], dtype=np.intp)
+
+    from_table = k < catalog.neighbor_indices.shape[1]
+    rows = catalog.similarity[indices] if len(indices) and (merged or not from_table) else None
 
     results = []
-    for i in top_indexes:
-        row = new_data.iloc[i[0]]
-        results.append({
-            "Drug Name": row['Drug Name'],
-            "Description": row.get('Description', 'N/A'),
-            "Side Effects": row.get('Side Effects', 'N/A'),
-            "How to use with": row.get('Uses', 'N/A')  
-        })
-    return {"recommended_drugs": results}
\ No newline at end of file
+    row = 0
+    for drug_name, (index, matched) in zip(drug_names, resolved):
+        if index is None:
+            results.append({"drug_name": drug_name, **not_found(catalog, drug_name)})
+            continue
+        neighbors = catalog.neighbors(index, k) if from_table else rank_neighbors(rows[row], k + 1)[1:]
+        results.append({"drug_name": drug_name, **recommendations(catalog, neighbors, matched)})
+        row += 1
+
+    response = {"results": results}
+    if merged:
+        ranked = []
+        if rows is not None:
+            scores = rows.mean(axis=0, dtype=np.float64)
+            for index in indices:
+                scores[catalog.name_rows[catalog.drug_name(index)]] = -np.inf
+            ranked = [i for i in rank_neighbors(scores, min(k, len(scores))) if np.isfinite(scores[i])]
+        response["merged"] = [catalog.record(i) for i in ranked]
+    return response
+
+# Drug names starting with the query, case-insensitive: exact matches first, then
+# alphabetical. Costs a binary search plus the returned page. With fuzzy=True, names
+# within a few typos of the query follow the prefix matches.
+def suggest_drugs(query, limit=None, offset=0, fuzzy=False):
+    catalog = get_catalog()
+    start, end = catalog.prefix_range(query)
+    names = catalog.prefix_names[min(start + offset, end):end if limit is None else min(end, start + offset + limit)]
+
+    if fuzzy and (limit is None or len(names) < limit):
+        prefix = query.lower()
+        close = [
+            name for name in (catalog.drug_name(row) for row in catalog.fuzzy_lookup(query, prefix=True))
+            if not name.lower().startswith(prefix)
+        ]
+        skip = max(0, offset - (end - start))
+        names += close[skip:] if limit is None else close[skip:skip + limit - len(names)]
+    return names
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class DiabetescareConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'diabetescare'
+
+    def ready(self):
+        # Registers the model artifacts; nothing is unpickled until first use or warmup
+        from . import predict, alternative_medicine  # noqa: F401
+        # Connects the signal receivers that keep the glucose rollups up to date
+        from . import rollups  # noqa: F401
@@ -0,0 +1,203 @@
+import functools
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseNotModified, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from rest_framework import exceptions, status
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from profiles.models import PatientProfile
+from . import alternative_medicine, predict
+from .executor import ExecutorSaturated, run_inference
+from .models import GlucoseTracking
+from .pagination import page_query, page_rows
+from .serializers import GlucoseTrackingSerializer
+from .views import (
+    catalog_cache_headers,
+    not_modified,
+    prerendered_response,
+    store_glucose_reading,
+    validate_prediction_input,
+    validate_recommendation_request,
+    validate_suggestion_request
+)
+
+# Async counterparts of the views in views.py for ASGI deployments (ASYNC_VIEWS=True).
+# DRF function views are sync only, so these authenticate with the same JWT backend
+# and return the same JSON bodies through JsonResponse.
+
+jwt_authentication = JWTAuthentication()
+
+
+def json_response(data, status=status.HTTP_200_OK, headers=None):
+    return JsonResponse(data, status=status, safe=False, headers=headers,
+                        json_dumps_params={"ensure_ascii": False})
+
+
+def async_api_view(methods):
+    def decorator(view):
+        @csrf_exempt
+        @require_http_methods(methods)
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            try:
+                authenticated = await sync_to_async(jwt_authentication.authenticate)(request)
+            except exceptions.AuthenticationFailed as e:
+                return json_response(e.detail if isinstance(e.detail, dict) else {"detail": e.detail},
+                                     status=status.HTTP_401_UNAUTHORIZED,
+                                     headers={"WWW-Authenticate": jwt_authentication.authenticate_header(request)})
+            if authenticated is None:
+                return json_response({"detail": "Authentication credentials were not provided."},
+                                     status=status.HTTP_401_UNAUTHORIZED,
+                                     headers={"WWW-Authenticate": jwt_authentication.authenticate_header(request)})
+
+            request.user, request.auth = authenticated
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def parse_body(request):
+    if request.content_type == "application/json":
+        return json.loads(request.body)
+    return request.POST
+
+
+def saturated_response(e):
+    return json_response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "1"})
+
+
+@async_api_view(['POST'])
+async def add_glucose_reading(request):
+    try:
+        patient = await PatientProfile.objects.aget(user=request.user)
+    except PatientProfile.DoesNotExist:
+        return json_response({"error": "Only patients can add glucose readings."}, status=status.HTTP_403_FORBIDDEN)
+
+    try:
+        data = parse_body(request)
+    except json.JSONDecodeError:
+        return json_response({"error": "Invalid JSON format in request body"}, status=status.HTTP_400_BAD_REQUEST)
+
+    serializer = GlucoseTrackingSerializer(data=data)
+    if serializer.is_valid():
+        glucose_reading = await sync_to_async(store_glucose_reading)(patient, serializer.validated_data)
+
+        return json_response({
+            "message": "Glucose reading added successfully!",
+            "data": GlucoseTrackingSerializer(glucose_reading).data
+        }, status=status.HTTP_201_CREATED)
+
+    return json_response({
+        "message": "Invalid data",
+        "errors": serializer.errors
+    }, status=status.HTTP_400_BAD_REQUEST)
+
+
+@async_api_view(['GET'])
+async def list_glucose_readings(request):
+    try:
+        patient = await PatientProfile.objects.aget(user=request.user)
+    except PatientProfile.DoesNotExist:
+        return json_response({"error": "Only patients can access their glucose readings."}, status=status.HTTP_403_FORBIDDEN)
+
+    readings, page, error = page_query(GlucoseTracking.objects.filter(patient=patient), 'timestamp', request.GET)
+    if error:
+        return json_response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+    readings, cursors = page_rows([reading async for reading in readings], 'timestamp', page)
+    serializer = GlucoseTrackingSerializer(readings, many=True)
+
+    return json_response({
+        "message": "Glucose readings retrieved successfully!",
+        "data": serializer.data,
+        **cursors
+    }, status=status.HTTP_200_OK)
+
+
+@async_api_view(['POST'])
+async def predict_diabetes(request):
+    try:
+        data = json.loads(request.body)
+
+        error = validate_prediction_input(data)
+        if error:
+            return json_response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Scoring (or waiting on the batcher / inference pool) happens off the event loop
+        result = await sync_to_async(predict.serve_prediction, thread_sensitive=False)(data)
+
+        return json_response(result, status=status.HTTP_200_OK)
+
+    except json.JSONDecodeError:
+        return json_response({"error": "Invalid JSON format in request body"}, status=status.HTTP_400_BAD_REQUEST)
+    except ExecutorSaturated as e:
+        return saturated_response(e)
+    except FileNotFoundError as e:
+        return json_response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    except Exception as e:
+        return json_response({"error": f"An error occurred: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@async_api_view(['GET', 'POST'])
+async def alternative_medicines(request):
+    try:
+        data = request.GET if request.method == 'GET' else json.loads(request.body)
+
+        parameters, error = validate_recommendation_request(data)
+        if error:
+            return json_response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        drug_name, k, fuzzy = parameters
+
+        headers = None
+        if request.method == 'GET':
+            # Reads the catalog version, which loads the catalog on first use
+            headers = await sync_to_async(catalog_cache_headers, thread_sensitive=False)("alternative-medicine", drug_name, k, fuzzy)
+            if not_modified(request, headers["ETag"]):
+                return HttpResponseNotModified(headers=headers)
+
+        # The first call, and the first after a catalog update, loads and prerenders the catalog
+        prerendered = await sync_to_async(alternative_medicine.prerendered_recommendation, thread_sensitive=False)(drug_name, k)
+        if prerendered:
+            return prerendered_response(request, prerendered, headers)
+
+        result = await sync_to_async(run_inference, thread_sensitive=False)(alternative_medicine.recommend_info, drug_name, k, fuzzy)
+
+        return json_response(result, status=status.HTTP_200_OK, headers=headers)
+
+    except json.JSONDecodeError:
+        return json_response({"error": "Invalid JSON format in request body"}, status=status.HTTP_400_BAD_REQUEST)
+    except ExecutorSaturated as e:
+        return saturated_response(e)
+    except FileNotFoundError as e:
+        return json_response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    except Exception as e:
+        return json_response({"error": f"An error occurred: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@async_api_view(['GET', 'POST'])
+async def drug_suggestions(request):
+    try:
+        data = request.GET if request.method == 'GET' else json.loads(request.body)
+
+        parameters, error = validate_suggestion_request(data)
+        if error:
+            return json_response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        query, limit, offset, fuzzy = parameters
+
+        headers = None
+        if request.method == 'GET':
+            # Reads the catalog version, which loads the catalog on first use
+            headers = await sync_to_async(catalog_cache_headers, thread_sensitive=False)("drug-suggestions", query, limit, offset, fuzzy)
+            if not_modified(request, headers["ETag"]):
+                return HttpResponseNotModified(headers=headers)
+
+        suggestions = await sync_to_async(alternative_medicine.suggest_drugs, thread_sensitive=False)(query, limit, offset, fuzzy)
+
+        return json_response(suggestions, status=status.HTTP_200_OK, headers=headers)
+
+    except json.JSONDecodeError:
+        return json_response({"error": "Invalid JSON format in request body"}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return json_response({"error": f"An error occurred: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
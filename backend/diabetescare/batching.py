@@ -0,0 +1,118 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+from .executor import ExecutorSaturated
+
+
+# Collects single requests from many threads and runs them through one batch call.
+# A batch is flushed when `window` seconds have passed since its first request or
+# when it reaches `max_batch_size`, whichever comes first. The handler must return one
+# result per input, in order.
+class MicroBatcher:
+    def __init__(self, handler, window, max_batch_size):
+        self.handler = handler
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._queue = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self.reset_metrics()
+
+    def submit(self, item, timeout):
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            raise ExecutorSaturated("Prediction timed out. Please retry shortly.")
+
+    def _ensure_worker(self):
+        # Started on first use so forked server workers each get their own thread
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="predict-micro-batcher", daemon=True)
+                self._worker.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = batch[0][2] + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            try:
+                results = list(self.handler([item for item, _, _ in batch]))
+                if len(results) != len(batch):
+                    raise RuntimeError(f"Batch handler returned {len(results)} results for {len(batch)} inputs")
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future, _), result in zip(batch, results):
+                    future.set_result(result)
+            self._record(batch, started, time.perf_counter())
+
+    def _record(self, batch, started, finished):
+        size = len(batch)
+        queue_times = [started - enqueued for _, _, enqueued in batch]
+        bucket = 1
+        while bucket < size:
+            bucket *= 2
+
+        with self._metrics_lock:
+            metrics = self._metrics
+            metrics["batches"] += 1
+            metrics["requests"] += size
+            metrics["max_batch_size"] = max(metrics["max_batch_size"], size)
+            metrics["batch_size_histogram"][bucket] = metrics["batch_size_histogram"].get(bucket, 0) + 1
+            metrics["queue_time_total"] += sum(queue_times)
+            metrics["max_queue_time"] = max(metrics["max_queue_time"], max(queue_times))
+            metrics["inference_time_total"] += finished - started
+
+    def reset_metrics(self):
+        with self._metrics_lock:
+            self._metrics = {
+                "batches": 0,
+                "requests": 0,
+                "max_batch_size": 0,
+                "batch_size_histogram": {},
+                "queue_time_total": 0.0,
+                "max_queue_time": 0.0,
+                "inference_time_total": 0.0,
+            }
+
+    def metrics(self):
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+            histogram = dict(sorted(metrics["batch_size_histogram"].items()))
+
+        batches = metrics["batches"] or 1
+        requests = metrics["requests"] or 1
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch_size_limit": self.max_batch_size,
+            "pending": self._queue.qsize(),
+            "batches": metrics["batches"],
+            "requests": metrics["requests"],
+            "mean_batch_size": metrics["requests"] / batches,
+            "max_batch_size": metrics["max_batch_size"],
+            # Keyed by the smallest power of two >= batch size
+            "batch_size_histogram": {f"<={size}": count for size, count in histogram.items()},
+            "mean_queue_time_ms": metrics["queue_time_total"] / requests * 1000,
+            "max_queue_time_ms": metrics["max_queue_time"] * 1000,
+            "mean_inference_time_ms": metrics["inference_time_total"] / batches * 1000,
+        }
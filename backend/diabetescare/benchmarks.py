@@ -0,0 +1,133 @@
+import gc
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+from . import alternative_medicine, predict
+
+
+# Deterministic intake-form rows covering every bin of the categorical features
+def sample_rows(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            'Pregnancies': float(rng.randint(0, 12)),
+            'Glucose': rng.uniform(40, 250),
+            'BloodPressure': rng.uniform(40, 120),
+            'SkinThickness': rng.uniform(0, 60),
+            'Insulin': rng.uniform(0, 400),
+            'BMI': rng.uniform(15, 55),
+            'DiabetesPedigreeFunction': rng.uniform(0.05, 2.5),
+            'Age': float(rng.randint(21, 81)),
+        }
+        for _ in range(count)
+    ]
+
+
+# name -> (callable taking the iteration number, items processed per call)
+def benchmark_cases():
+    rows = sample_rows(512)
+    frames = [predict.preprocess_input(row) for row in rows[:64]]
+    batch = sample_rows(1000, seed=1)
+
+    drug_names = list(alternative_medicine.get_catalog().drug_names)
+    rng = random.Random(0)
+    drugs = [rng.choice(drug_names) for _ in range(256)]
+    # What the autocomplete sends while a name is typed: growing prefixes
+    queries = [name[:length] for name in drugs[:64] for length in (1, 2, 3, 5, 8)]
+
+    return {
+        "predict.preprocess_input": (lambda i: predict.preprocess_input(rows[i % len(rows)]), 1),
+        "predict.scale_features": (lambda i: predict.scale_features(frames[i % len(frames)]), 1),
+        "predict.predict_diabetes": (lambda i: predict.predict_diabetes(rows[i % len(rows)]), 1),
+        "predict.predict_diabetes_batch[1000]": (lambda i: predict.predict_diabetes_batch(batch), len(batch)),
+        "alternative_medicine.recommend_info": (lambda i: alternative_medicine.recommend_info(drugs[i % len(drugs)]), 1),
+        "alternative_medicine.suggest_drugs": (lambda i: alternative_medicine.suggest_drugs(queries[i % len(queries)]), 1),
+    }
+
+
+def measure(fn, items, iterations, warmup, memory_iterations):
+    for i in range(warmup):
+        fn(i)
+
+    gc.collect()
+    timings = np.empty(iterations, dtype=np.int64)
+    started = time.perf_counter_ns()
+    for i in range(iterations):
+        before = time.perf_counter_ns()
+        fn(i)
+        timings[i] = time.perf_counter_ns() - before
+    elapsed = time.perf_counter_ns() - started
+
+    # Separate pass, tracemalloc slows every allocation down
+    gc.collect()
+    tracemalloc.start()
+    for i in range(memory_iterations):
+        fn(i)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    p50, p95, p99 = np.percentile(timings, [50, 95, 99]) / 1000
+    return {
+        "iterations": iterations,
+        "items_per_call": items,
+        "mean_us": float(timings.mean() / 1000),
+        "p50_us": float(p50),
+        "p95_us": float(p95),
+        "p99_us": float(p99),
+        "calls_per_sec": iterations / (elapsed / 1e9),
+        "items_per_sec": iterations * items / (elapsed / 1e9),
+        "peak_memory_kib": peak / 1024,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(iterations=1000, warmup=50, memory_iterations=20, only=None, progress=None):
+    results = {}
+    for name, (fn, items) in benchmark_cases().items():
+        if only and not any(pattern in name for pattern in only):
+            continue
+        # Batch cases are much slower per call; keep their wall time comparable
+        case_iterations = max(10, iterations // items) if items > 1 else iterations
+        results[name] = measure(fn, items, case_iterations, min(warmup, case_iterations), memory_iterations)
+        if progress:
+            progress(name, results[name])
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "diabetes_prediction_version": predict.registry.version("diabetes_prediction"),
+            "alternative_medicine_version": predict.registry.version("alternative_medicine"),
+        },
+        "results": results,
+    }
+
+
+# Relative change per case for the latency and throughput figures
+def compare(baseline, current):
+    rows = []
+    for name, result in current["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        row = {"name": name}
+        for key in ("p50_us", "p99_us", "items_per_sec", "peak_memory_kib"):
+            row[key] = (result[key] - previous[key]) / previous[key] * 100 if previous[key] else None
+        rows.append(row)
+    return rows
@@ -0,0 +1,277 @@
+import json
+import os
+import pickle
+import shutil
+import time
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+from django.conf import settings
+
+from .alternative_medicine import (
+    build_neighbor_table,
+    catalog_paths,
+    manifest_paths,
+    rank_neighbors,
+    read_catalog,
+    read_manifest,
+)
+
+# Incremental updates of the alternative-medicine catalog ('manage.py update_catalog').
+# Each update is written to models/alternative_medicine/versions/<version>/ and made
+# current by replacing catalog.json, which the model registry watches.
+
+# Catalog columns a drug update may set; "Index" is assigned from the row number
+drug_fields = ("Drug Name", "tags", "Description", "Side Effects", "Uses")
+
+published_files = {
+    "medicine_data": "medicine_dict.pkl",
+    "similarity_matrix": "similarity.npy",
+    "similarity_index": "similarity_index.json",
+    "features": "features.npz",
+    "neighbors": "neighbors.npz",
+}
+
+
+# Tokeniser of the CountVectorizer(stop_words='english') the similarity matrix was built
+# with: lowercased \b\w\w+\b tokens without English stop words
+def tag_analyzer():
+    from sklearn.feature_extraction.text import CountVectorizer
+    return CountVectorizer(stop_words='english').build_analyzer()
+
+
+# Sparse term counts of each text. New tokens are appended to `vocabulary` (token -> column),
+# so existing columns keep their meaning; the original max_features=5000 cap is far above
+# the catalog's vocabulary, so this matches refitting the vectoriser.
+def count_vectors(texts, vocabulary):
+    from scipy import sparse
+
+    analyze = tag_analyzer()
+    data, indices, indptr = [], [], [0]
+    for text in texts:
+        counts = {}
+        for token in analyze(text):
+            column = vocabulary.setdefault(token, len(vocabulary))
+            counts[column] = counts.get(column, 0) + 1
+        for column in sorted(counts):
+            indices.append(column)
+            data.append(counts[column])
+        indptr.append(len(indices))
+    return sparse.csr_matrix((np.array(data, dtype=np.int64), np.array(indices, dtype=np.int32), np.array(indptr)),
+                             shape=(len(texts), len(vocabulary)))
+
+
+def save_features(path, matrix, vocabulary):
+    tokens = sorted(vocabulary, key=vocabulary.get)
+    np.savez(path, data=matrix.data, indices=matrix.indices, indptr=matrix.indptr,
+             shape=np.array(matrix.shape), vocabulary=np.array(tokens, dtype=str))
+
+
+def load_features(path):
+    from scipy import sparse
+
+    with np.load(path) as features:
+        matrix = sparse.csr_matrix((features["data"], features["indices"], features["indptr"]),
+                                   shape=tuple(features["shape"]))
+        vocabulary = {token: column for column, token in enumerate(features["vocabulary"].tolist())}
+    return matrix, vocabulary
+
+
+# Current catalog as (medicine data, similarity, neighbour table, features, vocabulary).
+# Before the first update there is no feature store; it is rebuilt from the tags column and
+# checked against the existing similarity matrix.
+def read_current_catalog(paths=catalog_paths):
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    medicine_data, similarity, table = read_catalog(paths)
+    manifest = read_manifest(paths["manifest"])
+    if manifest is not None:
+        features, vocabulary = load_features(manifest_paths(paths["manifest"], manifest)["features"])
+        return medicine_data, similarity, table, features, vocabulary
+
+    vocabulary = {}
+    features = count_vectors([medicine_data["tags"][row] for row in range(len(similarity))], vocabulary)
+    if not np.allclose(cosine_similarity(features), np.asarray(similarity, dtype=np.float64), atol=1e-3):
+        raise ValueError("Tag vectors do not reproduce the existing similarity matrix.")
+    return medicine_data, similarity, table, features, vocabulary
+
+
+# New top-k table after the rows and columns in `changed` were rewritten, plus the number
+# of rows that were touched. Rows of changed drugs, and rows that listed an updated drug
+# (its score may have dropped), are ranked again from their similarity row. Every other row
+# only needs the changed columns merged into its current entries, because all the columns
+# it does not list are unchanged.
+def update_neighbor_table(similarity, table, changed, width):
+    if table is None or table[0].shape[1] != width:
+        return (*build_neighbor_table(similarity, width), len(similarity))
+    if not changed:
+        return table[0], table[1], 0
+
+    old_indices, old_scores = table
+    n_old = len(old_indices)
+    changed = np.array(sorted(changed), dtype=np.int64)
+    indices = np.empty((len(similarity), width), dtype=np.int32)
+    scores = np.empty((len(similarity), width), dtype=similarity.dtype)
+    indices[:n_old] = old_indices
+    scores[:n_old] = old_scores
+
+    rerank = set(changed.tolist())
+    updated = changed[changed < n_old]
+    if len(updated):
+        rerank.update(np.flatnonzero(np.isin(old_indices, updated).any(axis=1)).tolist())
+
+    # The matrix is symmetric: column c is row c, which is a contiguous read
+    column_scores = np.asarray(similarity[changed]).T[:n_old]
+    cutoff_scores = old_scores[:, -1:]
+    cutoff_indices = old_indices[:, -1:]
+    enters = (column_scores > cutoff_scores) | ((column_scores == cutoff_scores) & (changed < cutoff_indices))
+    merge = [row for row in np.flatnonzero(enters.any(axis=1)).tolist() if row not in rerank]
+
+    for row in merge:
+        candidates = np.concatenate([old_indices[row], changed])
+        candidate_scores = np.concatenate([old_scores[row], column_scores[row]])
+        order = np.lexsort((candidates, -candidate_scores))[:width]
+        indices[row] = candidates[order]
+        scores[row] = candidate_scores[order]
+
+    for row in sorted(rerank):
+        row_scores = np.asarray(similarity[row])
+        top = rank_neighbors(row_scores, width)
+        indices[row] = top
+        scores[row] = row_scores[top]
+
+    return indices, scores, len(merge) + len(rerank)
+
+
+def validate_drugs(drugs, medicine_data):
+    if not isinstance(drugs, list) or not drugs:
+        raise ValueError("The update must be a non-empty JSON list of drug objects.")
+
+    existing = set(medicine_data["Drug Name"].values())
+    seen = set()
+    for position, drug in enumerate(drugs):
+        if not isinstance(drug, dict) or not isinstance(drug.get("Drug Name"), str) or not drug["Drug Name"].strip():
+            raise ValueError(f"Drug {position}: every entry needs a non-empty 'Drug Name'.")
+        unknown = set(drug) - set(drug_fields)
+        if unknown:
+            raise ValueError(f"Drug {position}: unknown fields {sorted(unknown)}; allowed are {list(drug_fields)}.")
+        if not all(isinstance(value, str) for value in drug.values()):
+            raise ValueError(f"Drug {position}: all fields must be strings.")
+        if drug["Drug Name"] in seen:
+            raise ValueError(f"Drug {position}: '{drug['Drug Name']}' is listed twice.")
+        if drug["Drug Name"] not in existing and "tags" not in drug:
+            raise ValueError(f"Drug {position}: new drug '{drug['Drug Name']}' needs 'tags'.")
+        seen.add(drug["Drug Name"])
+
+
+# Append new drugs and update existing ones (matched by exact name, first row with it) and
+# publish the result as a new catalog version. Only the similarity rows and columns of
+# drugs whose tags changed are computed; the rest of the matrix is copied over as is.
+def update_catalog(drugs, paths=catalog_paths, keep=3):
+    from scipy import sparse
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    started = time.perf_counter()
+    medicine_data, similarity, table, features, vocabulary = read_current_catalog(paths)
+    validate_drugs(drugs, medicine_data)
+
+    n_old = len(similarity)
+    first_rows = {}
+    for row in range(n_old):
+        first_rows.setdefault(medicine_data["Drug Name"][row], row)
+
+    changed, appended, updated = [], 0, 0
+    for drug in drugs:
+        row = first_rows.get(drug["Drug Name"])
+        if row is None:
+            row = n_old + appended
+            appended += 1
+            for column in medicine_data:
+                medicine_data[column][row] = row + 1 if column == "Index" else drug.get(column, "")
+            changed.append(row)
+            continue
+
+        updated += 1
+        if "tags" in drug and drug["tags"] != medicine_data["tags"][row]:
+            changed.append(row)
+        for field in drug_fields:
+            if field in drug:
+                medicine_data[field][row] = drug[field]
+
+    n_new = n_old + appended
+    new_vectors = count_vectors([medicine_data["tags"][row] for row in changed], vocabulary)
+    features = features.copy()
+    features.resize((n_old, len(vocabulary)))
+    features = sparse.vstack([features, sparse.csr_matrix((appended, len(vocabulary)), dtype=features.dtype)]).tolil()
+    for position, row in enumerate(changed):
+        features[row] = new_vectors[position]
+    features = features.tocsr()
+
+    model_dir = os.path.dirname(paths["manifest"])
+    previous = read_manifest(paths["manifest"])
+    # Names sort in publication order, which prune_versions relies on
+    version = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')}-{uuid.uuid4().hex[:8]}"
+    versions_dir = os.path.join(model_dir, "versions")
+    staging = os.path.join(versions_dir, f".{version}.tmp")
+    os.makedirs(staging)
+    try:
+        files = {role: os.path.join(staging, name) for role, name in published_files.items()}
+
+        matrix = np.lib.format.open_memmap(files["similarity_matrix"], mode="w+", dtype=similarity.dtype, shape=(n_new, n_new))
+        matrix[:n_old, :n_old] = similarity
+        if changed:
+            rows = cosine_similarity(features[changed], features).astype(similarity.dtype)
+            matrix[changed, :] = rows
+            matrix[:, changed] = rows.T
+        matrix.flush()
+
+        width = min(settings.ALTERNATIVE_MEDICINE_TOP_K + 1, n_new)
+        indices, scores, reranked = update_neighbor_table(matrix, table, changed, width)
+        del matrix
+
+        with open(files["medicine_data"], "wb") as file:
+            pickle.dump(medicine_data, file)
+        with open(files["similarity_index"], "w", encoding="utf-8") as file:
+            json.dump([medicine_data["Drug Name"][row] for row in range(n_new)], file, ensure_ascii=False)
+        save_features(files["features"], features, vocabulary)
+        np.savez(files["neighbors"], indices=indices, scores=scores)
+
+        os.rename(staging, os.path.join(versions_dir, version))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    # Replacing the manifest is the atomic switch: workers load the new directory on their
+    # next registry check and never see a partially written version
+    manifest = {
+        "version": version,
+        "directory": f"versions/{version}",
+        "files": published_files,
+        "drugs": n_new,
+        "previous": previous["version"] if previous else None,
+    }
+    temporary = f"{paths['manifest']}.tmp"
+    with open(temporary, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2)
+    os.replace(temporary, paths["manifest"])
+
+    return {
+        "version": version,
+        "drugs": n_new,
+        "appended": appended,
+        "updated": updated,
+        "recomputed": len(changed),
+        "reranked": reranked,
+        "removed_versions": prune_versions(versions_dir, version, keep),
+        "seconds": time.perf_counter() - started,
+    }
+
+
+# Delete all but the `keep` newest version directories, never the current one
+def prune_versions(versions_dir, current, keep):
+    versions = sorted(name for name in os.listdir(versions_dir) if not name.startswith("."))
+    removed = [name for name in versions[:-keep] if name != current] if keep > 0 else []
+    for name in removed:
+        shutil.rmtree(os.path.join(versions_dir, name), ignore_errors=True)
+    return removed
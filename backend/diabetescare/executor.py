@@ -0,0 +1,111 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+
+class ExecutorSaturated(Exception):
+    pass
+
+
+# Runs in every pool process before it takes work: set up Django and load the models
+def _init_worker():
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    django.setup()
+
+    from .registry import registry
+    registry.warmup()
+
+
+# Process pool for CPU-bound scoring with a bounded number of in-flight jobs.
+# submit() fails fast with ExecutorSaturated instead of queueing without limit.
+class InferenceExecutor:
+    def __init__(self, workers, max_pending, timeout, start_method):
+        self.workers = workers or None
+        self.timeout = timeout
+        self.start_method = start_method
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context(self.start_method),
+                        initializer=_init_worker,
+                    )
+        return self._pool
+
+    def _reset_pool(self, pool):
+        with self._pool_lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise ExecutorSaturated("Inference workers are saturated. Please retry shortly.")
+
+        try:
+            pool = self._get_pool()
+            try:
+                future = pool.submit(fn, *args)
+            except BrokenProcessPool:
+                # A worker died; start a fresh pool and retry once
+                self._reset_pool(pool)
+                future = self._get_pool().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, fn, *args):
+        pool = self._get_pool()
+        future = self.submit(fn, *args)
+        try:
+            return future.result(self.timeout)
+        except TimeoutError:
+            raise ExecutorSaturated("Inference timed out. Please retry shortly.")
+        except BrokenProcessPool:
+            # The job's worker died; the next request gets a fresh pool
+            self._reset_pool(pool)
+            raise ExecutorSaturated("Inference worker restarted. Please retry shortly.")
+
+    def shutdown(self):
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = InferenceExecutor(
+                    workers=settings.INFERENCE_WORKERS,
+                    max_pending=settings.INFERENCE_MAX_PENDING,
+                    timeout=settings.INFERENCE_TIMEOUT,
+                    start_method=settings.INFERENCE_START_METHOD,
+                )
+    return _executor
+
+# Call fn in the inference pool when INFERENCE_EXECUTOR is enabled, otherwise inline
+def run_inference(fn, *args):
+    if settings.INFERENCE_EXECUTOR:
+        return get_executor().run(fn, *args)
+    return fn(*args)
@@ -0,0 +1,79 @@
+import numpy as np
+
+
+# Flatten a fitted RandomForestClassifier into plain node arrays. All trees share one
+# node numbering; leaves point to themselves so traversal can run a fixed number of steps.
+def export_forest(model):
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        nodes = np.arange(tree.node_count)
+        is_leaf = tree.children_left == -1
+
+        # Same normalisation as DecisionTreeClassifier.predict_proba
+        value = tree.value[:, 0, :].astype(np.float64)
+        normalizer = value.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        value = value / normalizer
+
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+        lefts.append(np.where(is_leaf, nodes, tree.children_left) + offset)
+        rights.append(np.where(is_leaf, nodes, tree.children_right) + offset)
+        values.append(value)
+        roots.append(offset)
+
+        offset += tree.node_count
+        max_depth = max(max_depth, tree.max_depth)
+
+    return {
+        "feature": np.concatenate(features).astype(np.int32),
+        "threshold": np.concatenate(thresholds).astype(np.float64),
+        "left": np.concatenate(lefts).astype(np.int32),
+        "right": np.concatenate(rights).astype(np.int32),
+        "value": np.concatenate(values),
+        "roots": np.array(roots, dtype=np.int32),
+        "max_depth": np.array(max_depth),
+        "n_features": np.array(model.n_features_in_),
+        "classes": np.asarray(model.classes_),
+    }
+
+
+# Pure-NumPy scorer for arrays produced by export_forest; matches
+# RandomForestClassifier.predict_proba bit for bit
+class FlatForest:
+    def __init__(self, arrays):
+        self.feature = arrays["feature"].astype(np.intp)
+        self.threshold = arrays["threshold"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"].astype(np.intp)
+        self.max_depth = int(arrays["max_depth"])
+        self.n_features_in_ = int(arrays["n_features"])
+        self.classes_ = arrays["classes"]
+        # children[2 * node + goes_left] is the next node
+        self.children = np.stack([arrays["right"], arrays["left"]], axis=1).ravel().astype(np.intp)
+
+    def apply(self, X):
+        # sklearn compares float32 features against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32).reshape(-1, self.n_features_in_)
+        flat = X.ravel()
+        row_offsets = (np.arange(X.shape[0]) * self.n_features_in_)[:, np.newaxis]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.roots.shape[0]))
+
+        for _ in range(self.max_depth):
+            goes_left = flat[row_offsets + self.feature[nodes]] <= self.threshold[nodes]
+            nodes = self.children[2 * nodes + goes_left]
+        return nodes
+
+    def predict_proba(self, X):
+        leaf_values = self.value[self.apply(X)]
+        # Sum tree by tree in estimator order, as sklearn accumulates them
+        proba = np.add.reduce(np.moveaxis(leaf_values, 1, 0), axis=0)
+        proba /= self.roots.shape[0]
+        return proba
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
@@ -0,0 +1,134 @@
+import numpy as np
+
+# Queries shorter than this have too few trigrams to rank anything useful
+MIN_QUERY_LENGTH = 3
+# Most typos tolerated in any query
+MAX_EDIT_DISTANCE = 3
+
+
+# Character trigrams of a string padded like pg_trgm. For prefix matching the
+# end-of-string trigram is left out, since the candidate may continue past the query.
+def trigrams(text, prefix=False):
+    padded = "  " + text if prefix else "  " + text + " "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# Levenshtein distance, or limit + 1 as soon as it is known to exceed limit. Only the
+# diagonal band of width 2 * limit + 1 can stay within limit, so only it is filled in.
+# With prefix=True, the distance from `a` to the closest prefix of `b`.
+def edit_distance(a, b, limit, prefix=False):
+    over = limit + 1
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i, char_a in enumerate(a, 1):
+        low, high = max(1, i - limit), min(len(b), i + limit)
+        current = [over] * (len(b) + 1)
+        if i <= limit:
+            current[0] = i
+        best = current[low - 1]
+        for j in range(low, high + 1):
+            cost = previous[j - 1] if char_a == b[j - 1] else previous[j - 1] + 1
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            current[j] = cost
+            if cost < best:
+                best = cost
+        if best > limit:
+            return over
+        previous = current
+    distance = min(previous) if prefix else previous[-1]
+    return distance if distance <= limit else over
+
+
+# The string itself and every string one deletion away from it
+def deletions(text):
+    return {text} | {text[:i] + text[i + 1:] for i in range(len(text))}
+
+
+# Typos tolerated for a query: one per four characters, between 1 and MAX_EDIT_DISTANCE
+def max_edit_distance(query):
+    return max(1, min(MAX_EDIT_DISTANCE, len(query) // 4))
+
+
+# Trigram -> key ids inverted index over a fixed list of (already normalised) keys.
+# A search only touches the posting lists of the query's trigrams and runs the edit
+# distance on the keys whose trigram overlap can still be within the allowed edits.
+# Results are the same as checking every key.
+class TrigramIndex:
+    def __init__(self, keys):
+        self.keys = list(keys)
+        gram_counts = []
+        postings = {}
+        for key_id, key in enumerate(self.keys):
+            grams = trigrams(key)
+            gram_counts.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(key_id)
+        self.gram_counts = np.array(gram_counts, dtype=np.int32)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+        # Prefix queries of MIN_QUERY_LENGTH characters have no more trigrams than one edit
+        # can change, so the trigram bound rules nothing out for them. They are looked up
+        # here instead: a key whose prefix is within one edit of the query shares a string
+        # of one deletion or less with it, taken from its first MIN_QUERY_LENGTH - 1 to
+        # MIN_QUERY_LENGTH + 1 characters.
+        short_prefixes = {}
+        for key_id, key in enumerate(self.keys):
+            for size in range(MIN_QUERY_LENGTH - 1, MIN_QUERY_LENGTH + 2):
+                for variant in deletions(key[:size]):
+                    if len(variant) >= MIN_QUERY_LENGTH - 1:
+                        short_prefixes.setdefault(variant, set()).add(key_id)
+        self.short_prefixes = {variant: np.array(sorted(ids), dtype=np.int32) for variant, ids in short_prefixes.items()}
+
+    # (key ids, shared trigram counts) of the keys that can be within `limit` edits of
+    # the query, in no particular order
+    def candidates(self, query, prefix, limit):
+        grams = trigrams(query, prefix)
+        lists = [self.postings[gram] for gram in grams if gram in self.postings]
+        hits = np.concatenate(lists) if lists else np.empty(0, dtype=np.int32)
+
+        if prefix and len(query) == MIN_QUERY_LENGTH:
+            key_ids = np.unique(np.concatenate([self.short_prefixes.get(variant, np.empty(0, dtype=np.int32))
+                                                for variant in deletions(query)]))
+            return key_ids, (hits[:, None] == key_ids).sum(axis=0)
+
+        # One edit changes at most three trigrams on either side, so a key within `limit`
+        # edits shares all but 3 * limit of the query's trigrams (and, for whole-key
+        # matches, of its own). Every other query has more than 3 * limit trigram
+        # positions, so a match shares at least one and is in the posting lists.
+        key_ids, shared = np.unique(hits, return_counts=True)
+        required = len(grams) if prefix else np.maximum(len(grams), self.gram_counts[key_ids])
+        keep = shared >= required - 3 * limit
+        return key_ids[keep], shared[keep]
+
+    # Ids of keys within max_edit_distance of the query, closest first, then by
+    # trigram overlap and key. prefix=True matches the query against key prefixes.
+    def search(self, query, prefix=False):
+        if len(query) < MIN_QUERY_LENGTH:
+            return []
+
+        limit = max_edit_distance(query)
+        key_ids, shared = self.candidates(query, prefix, limit)
+        order = np.lexsort((key_ids, -shared))
+        candidates = zip(key_ids[order].tolist(), shared[order].tolist())
+
+        ranked = []
+        # Prefix matching only looks at the start of each key, which many keys share
+        prefix_distances = {}
+        for key_id, common in candidates:
+            key = self.keys[key_id]
+            if prefix:
+                head = key[:len(query) + limit]
+                if head not in prefix_distances:
+                    prefix_distances[head] = edit_distance(query, head, limit, prefix=True)
+                distance = prefix_distances[head]
+            elif abs(len(key) - len(query)) > limit:
+                continue
+            else:
+                distance = edit_distance(query, key, limit)
+            if distance <= limit:
+                ranked.append((distance, -common, key, key_id))
+
+        ranked.sort()
+        return [key_id for _, _, _, key_id in ranked]
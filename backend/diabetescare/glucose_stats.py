@@ -0,0 +1,170 @@
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+from django.db.models import FloatField, Func
+from django.utils import timezone
+
+from .models import GlucoseDailyRollup, GlucoseTracking
+
+# Glucose Management Indicator (%) from mean glucose in mg/dL (Bergenstal et al. 2018)
+GMI_INTERCEPT = 3.31
+GMI_SLOPE = 0.02392
+
+
+# Seconds since the Unix epoch as a float, so readings reach NumPy without a datetime
+# object being built per row
+class Epoch(Func):
+    template = "EXTRACT(EPOCH FROM %(expressions)s)"
+    output_field = FloatField()
+
+    # julianday() rounds to milliseconds and its float scaling is off by a few microseconds,
+    # enough to put a reading at midnight into the day before. Whole seconds come from the
+    # "YYYY-MM-DD HH:MM:SS" prefix (rounded back to an exact integer) and the fraction from
+    # the stored ".ffffff" suffix.
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template=("(ROUND((julianday(substr(%(expressions)s, 1, 19)) - 2440587.5) * 86400.0)"
+                      " + CAST(substr(%(expressions)s, 20) AS REAL))"),
+            **extra_context,
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template="UNIX_TIMESTAMP(%(expressions)s)", **extra_context)
+
+
+# (values, epoch seconds) of the readings in `queryset`, oldest first. The compiled query
+# runs on a plain cursor: the rows are two floats each and need none of the per-row
+# conversion the queryset iterator does.
+def reading_arrays(queryset):
+    readings = queryset.order_by('timestamp', 'id').values_list('glucose_value', Epoch('timestamp'))
+    sql, params = readings.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    if not rows:
+        return np.empty(0), np.empty(0)
+    data = np.array(rows, dtype=np.float64)
+    return data[:, 0], data[:, 1]
+
+
+# Epoch seconds of each midnight from `start` to the day after `end` in the current time zone
+def day_boundaries(start, end):
+    days = (end - start).days + 1
+    return np.array([
+        timezone.make_aware(datetime.combine(start + timedelta(days=day), time.min)).timestamp()
+        for day in range(days + 1)
+    ])
+
+
+# Per-row totals in the column order of the rollup models, and how each column combines
+totals_columns = ("count", "total", "sum_squares", "minimum", "maximum", "below_range", "in_range", "above_range")
+totals_reducers = (np.add, np.add, np.add, np.minimum, np.maximum, np.add, np.add, np.add)
+
+
+# Totals of single readings: every reading is a group of one
+def reading_totals(values, low, high):
+    below = values < low
+    above = values > high
+    return np.column_stack([np.ones_like(values), values, values * values, values, values,
+                            below, ~(below | above), above]).astype(np.float64)
+
+
+# Statistics of each group of `totals` rows; `groups` holds the group number of every row
+# and is non-decreasing. Returns {group number: statistics} for the non-empty groups.
+def group_statistics(totals, groups):
+    if not len(totals):
+        return {}
+    present, starts = np.unique(groups, return_index=True)
+    counts, sums, squares, minimums, maximums, below, in_range, above = (
+        reducer.reduceat(totals[:, column], starts) for column, reducer in enumerate(totals_reducers)
+    )
+
+    means = sums / counts
+    deviations = np.sqrt(np.maximum(squares / counts - means * means, 0.0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variations = np.where(means > 0, deviations / means * 100, 0.0)
+
+    return {
+        int(group): {
+            "count": int(counts[i]),
+            "mean": round(float(means[i]), 2),
+            "sd": round(float(deviations[i]), 2),
+            "cv": round(float(variations[i]), 2),
+            "gmi": round(GMI_INTERCEPT + GMI_SLOPE * float(means[i]), 2),
+            "min": float(minimums[i]),
+            "max": float(maximums[i]),
+            "time_below_range": round(float(below[i] / counts[i] * 100), 2),
+            "time_in_range": round(float(in_range[i] / counts[i] * 100), 2),
+            "time_above_range": round(float(above[i] / counts[i] * 100), 2),
+        }
+        for i, group in enumerate(present)
+    }
+
+
+# Summary and per-day statistics of one series; `days` is the day number of each totals
+# row. Percentages are shares of readings.
+def series_statistics(totals, days, start):
+    summary = group_statistics(totals, np.zeros(len(totals), dtype=np.int64)).get(0)
+    return {
+        "summary": summary or {"count": 0},
+        "days": [{"date": (start + timedelta(days=day)).isoformat(), **day_statistics}
+                 for day, day_statistics in group_statistics(totals, days).items()],
+    }
+
+
+# Statistics of a patient's readings from `start` to `end` (dates, inclusive), overall
+# and per glucose type. Read from the daily rollups with GLUCOSE_STATISTICS_FROM_ROLLUPS,
+# otherwise computed from the readings.
+def glucose_statistics(patient, start, end, low, high):
+    if settings.GLUCOSE_STATISTICS_FROM_ROLLUPS:
+        overall, by_type = rollup_statistics(patient, start, end)
+    else:
+        overall, by_type = reading_statistics(patient, start, end, low, high)
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "target_range": {"low": low, "high": high},
+        "overall": overall,
+        "by_type": by_type,
+    }
+
+
+def reading_statistics(patient, start, end, low, high):
+    boundaries = day_boundaries(start, end)
+    window = GlucoseTracking.objects.filter(
+        patient=patient,
+        timestamp__gte=datetime.fromtimestamp(boundaries[0], dt_timezone.utc),
+        timestamp__lt=datetime.fromtimestamp(boundaries[-1], dt_timezone.utc),
+    )
+
+    by_type, all_totals, all_epochs = {}, [], []
+    # One query per type, each a range scan of the (patient, glucose_type, timestamp) index
+    for glucose_type, _ in GlucoseTracking.GLUCOSE_TYPES:
+        values, epochs = reading_arrays(window.filter(glucose_type=glucose_type))
+        totals = reading_totals(values, low, high)
+        by_type[glucose_type] = series_statistics(totals, np.searchsorted(boundaries, epochs, side='right') - 1, start)
+        all_totals.append(totals)
+        all_epochs.append(epochs)
+
+    epochs = np.concatenate(all_epochs)
+    order = np.argsort(epochs, kind='stable')
+    days = np.searchsorted(boundaries, epochs[order], side='right') - 1
+    return series_statistics(np.concatenate(all_totals)[order], days, start), by_type
+
+
+# One row per patient, type and day with readings, instead of every reading
+def rollup_statistics(patient, start, end):
+    rows = list(GlucoseDailyRollup.objects.filter(patient=patient, day__gte=start, day__lte=end)
+                .order_by('day', 'glucose_type').values_list('glucose_type', 'day', *totals_columns))
+    types = np.array([row[0] for row in rows], dtype=object)
+    days = np.array([(row[1] - start).days for row in rows], dtype=np.int64)
+    totals = np.array([row[2:] for row in rows], dtype=np.float64).reshape(len(rows), len(totals_columns))
+
+    by_type = {}
+    for glucose_type, _ in GlucoseTracking.GLUCOSE_TYPES:
+        mask = types == glucose_type
+        by_type[glucose_type] = series_statistics(totals[mask], days[mask], start)
+    return series_statistics(totals, days, start), by_type
@@ -0,0 +1,45 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from diabetescare.benchmarks import compare, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = "Benchmark the prediction and drug catalog hot paths and optionally save or diff JSON baselines."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=1000)
+        parser.add_argument('--warmup', type=int, default=50)
+        parser.add_argument('--only', action='append', help="Run only cases whose name contains this text.")
+        parser.add_argument('--save', help="Write the results as a JSON baseline to this path.")
+        parser.add_argument('--compare', help="Diff the results against a saved JSON baseline.")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'case':<44}{'p50 us':>11}{'p95 us':>11}{'p99 us':>11}{'items/s':>13}{'peak KiB':>11}")
+
+        def progress(name, result):
+            self.stdout.write(
+                f"{name:<44}{result['p50_us']:>11.1f}{result['p95_us']:>11.1f}{result['p99_us']:>11.1f}"
+                f"{result['items_per_sec']:>13.0f}{result['peak_memory_kib']:>11.1f}"
+            )
+
+        report = run_benchmarks(options['iterations'], options['warmup'], only=options['only'], progress=progress)
+
+        if options['save']:
+            with open(options['save'], 'w') as file:
+                json.dump(report, file, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Saved baseline to {options['save']}"))
+
+        if options['compare']:
+            with open(options['compare']) as file:
+                baseline = json.load(file)
+
+            self.stdout.write(f"\nChange vs {options['compare']} ({baseline['meta'].get('git_revision')}), negative latency is better")
+            self.stdout.write(f"{'case':<44}{'p50':>10}{'p99':>10}{'items/s':>10}{'memory':>10}")
+            for row in compare(baseline, report):
+                cells = "".join(
+                    f"{row[key]:>+9.1f}%" if row[key] is not None else f"{'n/a':>10}"
+                    for key in ("p50_us", "p99_us", "items_per_sec", "peak_memory_kib")
+                )
+                self.stdout.write(f"{row['name']:<44}{cells}")
@@ -0,0 +1,41 @@
+import json
+import os
+import pickle
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from diabetescare.alternative_medicine import catalog_paths
+
+
+class Command(BaseCommand):
+    help = "Convert similarity.pkl into a memory-mappable similarity.npy plus its drug name index."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dtype', choices=['float16', 'float32', 'float64'], default='float32',
+                            help="Storage type of the matrix (default: float32).")
+
+    def handle(self, *args, **options):
+        with open(catalog_paths["medicine_data"], "rb") as file:
+            medicine_data = pickle.load(file)
+        with open(catalog_paths["similarity"], "rb") as file:
+            similarity = np.asarray(pickle.load(file))
+
+        drug_names = list(medicine_data['Drug Name'].values())
+        matrix = np.ascontiguousarray(similarity, dtype=options['dtype'])
+
+        # Write next to the targets and rename so workers never map a partial file
+        matrix_temporary = f"{catalog_paths['similarity_matrix']}.tmp"
+        with open(matrix_temporary, "wb") as file:
+            np.save(file, matrix)
+        index_temporary = f"{catalog_paths['similarity_index']}.tmp"
+        with open(index_temporary, "w", encoding="utf-8") as file:
+            json.dump(drug_names, file, ensure_ascii=False)
+
+        os.replace(matrix_temporary, catalog_paths["similarity_matrix"])
+        os.replace(index_temporary, catalog_paths["similarity_index"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {matrix.shape[0]}x{matrix.shape[1]} {matrix.dtype} matrix "
+            f"({matrix.nbytes / 1024:.0f} KiB) to {catalog_paths['similarity_matrix']}"
+        ))
@@ -0,0 +1,44 @@
+import os
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from diabetescare import predict
+from diabetescare.forest import FlatForest, export_forest
+from diabetescare.registry import file_sha256
+
+
+class Command(BaseCommand):
+    help = "Export diabetes.pkl and scaler.pkl to NumPy arrays so serving does not need scikit-learn."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--samples', type=int, default=10000,
+                            help="Random rows used to check the export against the sklearn model.")
+
+    def handle(self, *args, **options):
+        paths = predict.predictor_paths
+        reference = predict.load_pickled_predictor(paths)
+
+        arrays = export_forest(reference.model)
+        arrays["scaler_mean"] = np.asarray(reference.scaler.mean_, dtype=np.float64)
+        arrays["scaler_scale"] = np.asarray(reference.scaler.scale_, dtype=np.float64)
+        arrays["model_sha256"] = np.array(file_sha256(paths["model"]))
+        arrays["scaler_sha256"] = np.array(file_sha256(paths["scaler"]))
+
+        rng = np.random.default_rng(0)
+        n_numerical = len(predict.numerical_cols)
+        X = rng.normal(scale=2.0, size=(options['samples'], arrays["n_features"].item()))
+        X[:, n_numerical:] = rng.integers(0, 2, size=(X.shape[0], X.shape[1] - n_numerical))
+        if not np.array_equal(FlatForest(arrays).predict_proba(X), reference.model.predict_proba(X)):
+            raise CommandError("Exported forest does not reproduce the sklearn probabilities.")
+
+        # Write next to the target and rename so running workers never see a partial file
+        target = paths["compiled"]
+        temporary = f"{target}.tmp"
+        with open(temporary, "wb") as file:
+            np.savez(file, **arrays)
+        os.replace(temporary, target)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Exported {len(arrays['roots'])} trees ({len(arrays['feature'])} nodes) to {target}"
+        ))
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from diabetescare.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = ("Recompute the daily and hourly glucose rollups from the stored readings. Run after "
+            "migrating to fill them for existing readings, or after changing the glucose target range.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patient', type=int, action='append', dest='patients',
+                            help="Rebuild only this patient profile id (may be repeated).")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        daily, hourly = rebuild_rollups(options['patients'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {daily} daily and {hourly} hourly glucose rollups in {time.perf_counter() - started:.2f}s"
+        ))
@@ -0,0 +1,36 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from diabetescare.catalog_store import drug_fields, update_catalog
+
+
+class Command(BaseCommand):
+    help = ("Append or update alternative-medicine drugs from a JSON list and publish a new catalog "
+            "version, recomputing only the similarity rows of the changed drugs.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help=f"JSON file with a list of drug objects (fields: {', '.join(drug_fields)}).")
+        parser.add_argument('--keep', type=int, default=3,
+                            help="Number of published versions to keep on disk (default: 3).")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], encoding="utf-8") as file:
+                drugs = json.load(file)
+        except (OSError, json.JSONDecodeError) as e:
+            raise CommandError(f"Could not read {options['path']}: {e}")
+
+        try:
+            summary = update_catalog(drugs, keep=options['keep'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Published catalog version {summary['version']} with {summary['drugs']} drugs: "
+            f"{summary['appended']} appended, {summary['updated']} updated, "
+            f"{summary['recomputed']} similarity rows computed, {summary['reranked']} neighbour rows re-ranked "
+            f"in {summary['seconds']:.2f}s"
+        ))
+        if summary['removed_versions']:
+            self.stdout.write(f"Removed old versions: {', '.join(summary['removed_versions'])}")
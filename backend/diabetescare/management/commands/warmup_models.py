@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from diabetescare.registry import registry
+
+
+class Command(BaseCommand):
+    help = "Load the model artifacts and print their versions and file hashes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help="Artifacts to load (default: all registered).")
+
+    def handle(self, *args, **options):
+        names = options['names'] or registry.names()
+        registry.warmup(names)
+
+        for name in names:
+            info = registry.info(name)
+            self.stdout.write(self.style.SUCCESS(f"{name}: version {info['version']}"))
+            for role, details in info['files'].items():
+                self.stdout.write(f"  {role}: {details['path']} sha256={details['sha256']}")
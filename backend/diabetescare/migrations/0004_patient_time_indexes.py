@@ -0,0 +1,26 @@
+# Generated by Django 5.1.5 on 2026-10-17 22:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diabetescare', '0003_analysisimage_comment'),
+        ('profiles', '0007_doctorpatientrelation_created_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='analysisimage',
+            index=models.Index(fields=['patient', 'uploaded_at'], name='analysis_patient_uploaded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='glucosetracking',
+            index=models.Index(fields=['patient', 'timestamp'], name='glucose_patient_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='glucosetracking',
+            index=models.Index(fields=['patient', 'glucose_type', 'timestamp'], name='glucose_patient_type_time_idx'),
+        ),
+    ]
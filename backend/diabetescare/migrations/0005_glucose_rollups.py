@@ -0,0 +1,55 @@
+# Generated by Django 5.1.5 on 2026-10-17 22:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diabetescare', '0004_patient_time_indexes'),
+        ('profiles', '0007_doctorpatientrelation_created_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GlucoseDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('glucose_type', models.CharField(choices=[('FBS', 'Fasting Blood Sugar'), ('PPBS', 'Postprandial Blood Sugar'), ('RBS', 'Random Blood Sugar')], max_length=4)),
+                ('count', models.PositiveIntegerField()),
+                ('total', models.FloatField()),
+                ('sum_squares', models.FloatField()),
+                ('minimum', models.FloatField()),
+                ('maximum', models.FloatField()),
+                ('below_range', models.PositiveIntegerField()),
+                ('in_range', models.PositiveIntegerField()),
+                ('above_range', models.PositiveIntegerField()),
+                ('day', models.DateField()),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='profiles.patientprofile')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('patient', 'day', 'glucose_type'), name='glucose_daily_rollup_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='GlucoseHourlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('glucose_type', models.CharField(choices=[('FBS', 'Fasting Blood Sugar'), ('PPBS', 'Postprandial Blood Sugar'), ('RBS', 'Random Blood Sugar')], max_length=4)),
+                ('count', models.PositiveIntegerField()),
+                ('total', models.FloatField()),
+                ('sum_squares', models.FloatField()),
+                ('minimum', models.FloatField()),
+                ('maximum', models.FloatField()),
+                ('below_range', models.PositiveIntegerField()),
+                ('in_range', models.PositiveIntegerField()),
+                ('above_range', models.PositiveIntegerField()),
+                ('hour', models.DateTimeField()),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='profiles.patientprofile')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('patient', 'hour', 'glucose_type'), name='glucose_hourly_rollup_unique')],
+            },
+        ),
+    ]
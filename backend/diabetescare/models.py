@@ -1,6 +1,17 @@
 from django.db import models
 from profiles.models import PatientProfile  
 
+# Deleting readings also updates the glucose rollups (diabetescare.rollups). Cascades from
+# a deleted patient use the plain base manager and stay a single DELETE.
+class GlucoseTrackingQuerySet(models.QuerySet):
+    def delete(self):
+        from .rollups import delete_readings
+        return delete_readings(self)
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
 class GlucoseTracking(models.Model):
     GLUCOSE_TYPES = (
         ('FBS', 'Fasting Blood Sugar'),
@@ -13,8 +24,24 @@ class GlucoseTracking(models.Model):
     glucose_value = models.FloatField() 
     timestamp = models.DateTimeField()
 
+    objects = GlucoseTrackingQuerySet.as_manager()
+
+    class Meta:
+        # Readings are always fetched per patient, newest first and optionally per type
+        indexes = [
+            models.Index(fields=['patient', 'timestamp'], name='glucose_patient_time_idx'),
+            models.Index(fields=['patient', 'glucose_type', 'timestamp'], name='glucose_patient_type_time_idx'),
+        ]
+
     def __str__(self):
         return f"{self.get_glucose_type_display()} - {self.glucose_value} mg/dL for {self.patient} at {self.timestamp}"
+
+    def delete(self, using=None, keep_parents=False):
+        if self.pk is None:
+            raise ValueError(f"{self._meta.object_name} object can't be deleted because its id attribute is set to None.")
+        deleted = GlucoseTracking.objects.db_manager(using or self._state.db).filter(pk=self.pk).delete()
+        self.pk = None
+        return deleted
     
 class AnalysisImage(models.Model):
     patient = models.ForeignKey(PatientProfile, on_delete=models.CASCADE, related_name='analysis_images')
@@ -23,5 +50,54 @@ class AnalysisImage(models.Model):
     uploaded_at = models.DateTimeField(auto_now_add=True)
     comment = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['patient', 'uploaded_at'], name='analysis_patient_uploaded_idx'),
+        ]
+
+    def __str__(self):
+        return f"Analysis Image for {self.patient} uploaded at {self.uploaded_at}"
+
+# Per patient, glucose type and local day / hour totals of GlucoseTracking, kept up to date
+# by diabetescare.rollups. Summaries are derived from the sums: mean = total / count and
+# SD from sum_squares. The range counters use the GLUCOSE_TARGET_LOW/HIGH of the time the
+# rollup was written; 'manage.py rebuild_glucose_rollups' recomputes them.
+class GlucoseRollup(models.Model):
+    patient = models.ForeignKey(PatientProfile, on_delete=models.CASCADE, related_name='+')
+    glucose_type = models.CharField(max_length=4, choices=GlucoseTracking.GLUCOSE_TYPES)
+    count = models.PositiveIntegerField()
+    total = models.FloatField()
+    sum_squares = models.FloatField()
+    minimum = models.FloatField()
+    maximum = models.FloatField()
+    below_range = models.PositiveIntegerField()
+    in_range = models.PositiveIntegerField()
+    above_range = models.PositiveIntegerField()
+
+    class Meta:
+        abstract = True
+
+
+class GlucoseDailyRollup(GlucoseRollup):
+    day = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['patient', 'day', 'glucose_type'], name='glucose_daily_rollup_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_glucose_type_display()} on {self.day} for {self.patient}: {self.count} readings"
+
+
+class GlucoseHourlyRollup(GlucoseRollup):
+    # Start of the local hour, as a UTC instant
+    hour = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['patient', 'hour', 'glucose_type'], name='glucose_hourly_rollup_unique'),
+        ]
+
     def __str__(self):
-        return f"Analysis Image for {self.patient} uploaded at {self.uploaded_at}"
\ No newline at end of file
+        return f"{self.get_glucose_type_display()} at {self.hour} for {self.patient}: {self.count} readings"
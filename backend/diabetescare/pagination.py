@@ -0,0 +1,95 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+# Keyset pagination of the newest-first glucose and analysis listings. Pages are ordered
+# by (field, id) descending and a cursor is the (field, id) key of the row a page starts
+# or ends at, so a page is one index range scan however far back it is: no OFFSET, and
+# rows added while a client pages through never shift or repeat entries.
+#
+# ?limit=N sets the page size, ?before=<cursor> returns the rows older than the cursor
+# and ?after=<cursor> the rows newer than it. Responses carry "next" (pass as before)
+# and "previous" (pass as after) cursors, null when there is nothing further that way.
+# A request with none of these parameters gets the whole listing, as before pagination:
+# released app builds read only "data" and never follow a cursor.
+
+
+def encode_cursor(row, field):
+    key = [getattr(row, field).isoformat(), row.pk]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        value, pk = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        value = datetime.fromisoformat(value)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        return None
+    if not isinstance(pk, int) or isinstance(pk, bool) or timezone.is_naive(value):
+        return None
+    return value, pk
+
+
+# (query for one page, page state) for the query parameters in `params`, or an error
+# message. The query fetches one row more than the page so the caller can tell whether
+# there is another page. Pages fetched with `after` come back oldest first. Without any
+# paging parameter the query is the full listing and the page state None.
+def page_query(queryset, field, params):
+    if not any(name in params for name in ('limit', 'before', 'after')):
+        return queryset.order_by(f"-{field}", '-id'), None, None
+
+    limit = params.get('limit', settings.LIST_PAGE_SIZE)
+    if isinstance(limit, str) and limit.strip().isdigit():
+        limit = int(limit)
+    if not isinstance(limit, int) or isinstance(limit, bool) or not 1 <= limit <= settings.LIST_MAX_PAGE_SIZE:
+        return None, None, f"limit must be an integer between 1 and {settings.LIST_MAX_PAGE_SIZE}"
+
+    before, after = params.get('before'), params.get('after')
+    if before and after:
+        return None, None, "Pass either before or after, not both"
+
+    direction = 'after' if after else 'before'
+    cursor = after or before
+    if cursor:
+        key = decode_cursor(cursor)
+        if key is None:
+            return None, None, f"Invalid {direction} cursor"
+        value, pk = key
+        # The redundant bound on `field` alone lets the (patient, field) index start the
+        # scan at the cursor; the OR by itself would be checked row by row from the top
+        if direction == 'after':
+            queryset = queryset.filter(Q(**{f"{field}__gt": value}) | Q(**{field: value, "id__gt": pk}),
+                                       **{f"{field}__gte": value})
+        else:
+            queryset = queryset.filter(Q(**{f"{field}__lt": value}) | Q(**{field: value, "id__lt": pk}),
+                                       **{f"{field}__lte": value})
+
+    if direction == 'after':
+        queryset = queryset.order_by(field, 'id')
+    else:
+        queryset = queryset.order_by(f"-{field}", '-id')
+    return queryset[:limit + 1], (direction, limit, bool(cursor)), None
+
+
+# The rows of the page, newest first, and its {"next", "previous"} cursors
+def page_rows(rows, field, page):
+    if page is None:
+        return rows, {"next": None, "previous": None}
+    direction, limit, has_cursor = page
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == 'after':
+        rows.reverse()
+        newer, older = more, has_cursor
+    else:
+        newer, older = has_cursor, more
+
+    return rows, {
+        "next": encode_cursor(rows[-1], field) if rows and older else None,
+        "previous": encode_cursor(rows[0], field) if rows and newer else None,
+    }
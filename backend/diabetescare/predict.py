@@ -1,19 +1,22 @@
 import pickle
-import pandas as pd
 import numpy as np
 import os
+import math
+import threading
+import functools
+import logging
+from bisect import bisect_left
+from django.conf import settings
+from .cache import LRUCache
+from .executor import run_inference
+from .forest import FlatForest
+from .registry import registry, file_sha256
+
+logger = logging.getLogger(__name__)
 
 # Get the base directory of the Django project
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-
-# Load the trained model and scaler
-try:
-    with open(os.path.join(BASE_DIR, "models", "diabetes_prediction", "diabetes.pkl"), "rb") as file:
-        model = pickle.load(file)
-    with open(os.path.join(BASE_DIR, "models", "diabetes_prediction", "scaler.pkl"), "rb") as file:
-        scaler = pickle.load(file)
-except FileNotFoundError:
-    raise FileNotFoundError("Model or scaler file not found. Ensure 'diabetes.pkl' and 'scaler.pkl' are in the 'models/diabetes_prediction' directory.")
+MODEL_DIR = os.path.join(BASE_DIR, "models", "diabetes_prediction")
 
 # Define the feature columns (same as in training)
 numerical_cols = ['Pregnancies', 'Glucose', 'BloodPressure', 'SkinThickness', 'Insulin', 
@@ -22,8 +25,11 @@ categorical_cols = ['NewBMI_Obesity 1', 'NewBMI_Obesity 2', 'NewBMI_Obesity 3',
                    'NewBMI_Overweight', 'NewBMI_Underweight', 'NewInsulinScore_Normal', 
                    'NewGlucose_Low', 'NewGlucose_Normal', 'NewGlucose_Overweight', 'NewGlucose_Secret']
 
-# Function to preprocess the input data
+# Reference preprocessing on pandas. The serving path uses FeaturePipeline below;
+# these are kept for parity tests and benchmarks.
 def preprocess_input(data):
+    import pandas as pd
+
     df = pd.DataFrame([data])
     
     # Create categorical features
@@ -57,24 +63,211 @@ def preprocess_input(data):
 def scale_features(df):
     # Scale numerical features
     numerical_data = df[numerical_cols]
-    scaled_data = scaler.transform(numerical_data)
+    scaled_data = reference_predictor().scaler.transform(numerical_data)
     # Combine scaled numerical features with categorical features
     scaled_df = np.hstack([scaled_data, df[categorical_cols].values])
     return scaled_df
 
+# Bin edges for the categorical flags. bisect_left/searchsorted return the number of
+# edges strictly below a value, so inclusive lower bounds are moved down by one ulp.
+feature_bins = [
+    ('BMI', (math.nextafter(18.5, -math.inf), 24.9, 29.9, 34.9, 39.9),
+     ('NewBMI_Underweight', None, 'NewBMI_Overweight', 'NewBMI_Obesity 1', 'NewBMI_Obesity 2', 'NewBMI_Obesity 3')),
+    ('Insulin', (math.nextafter(16, -math.inf), 166),
+     (None, 'NewInsulinScore_Normal', None)),
+    ('Glucose', (70, 99, 126),
+     ('NewGlucose_Low', 'NewGlucose_Normal', 'NewGlucose_Overweight', 'NewGlucose_Secret')),
+]
+
+# Compiled replacement for preprocess_input + scale_features, built once from the scaler parameters
+class FeaturePipeline:
+    def __init__(self, mean, scale):
+        self.n_numerical = len(numerical_cols)
+        self.n_features = self.n_numerical + len(categorical_cols)
+        self.mean = np.array(mean, dtype=np.float64)
+        self.scale = np.array(scale, dtype=np.float64)
+
+        # (feature name, feature position, edges, output column per bin or -1)
+        self.bins = []
+        for feature, edges, columns in feature_bins:
+            outputs = tuple(-1 if column is None else self.n_numerical + categorical_cols.index(column)
+                            for column in columns)
+            self.bins.append((feature, numerical_cols.index(feature), tuple(edges), outputs))
+
+        self._local = threading.local()
+
+    # One preallocated row per thread, reused across requests
+    def _buffer(self):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            buffer = self._local.buffer = np.empty((1, self.n_features), dtype=np.float64)
+        return buffer
+
+    def transform(self, data):
+        buffer = self._buffer()
+        row = buffer[0]
+        row[self.n_numerical:] = 0.0
+
+        for position, col in enumerate(numerical_cols):
+            row[position] = data[col]
+
+        for feature, _, edges, outputs in self.bins:
+            column = outputs[bisect_left(edges, data[feature])]
+            if column >= 0:
+                row[column] = 1.0
+
+        # Same arithmetic as StandardScaler.transform
+        numerical = row[:self.n_numerical]
+        numerical -= self.mean
+        numerical /= self.scale
+        return buffer
+
+    def transform_batch(self, rows):
+        features = np.zeros((len(rows), self.n_features), dtype=np.float64)
+        numerical = features[:, :self.n_numerical]
+        numerical[:] = [[row[col] for col in numerical_cols] for row in rows]
+
+        positions = np.arange(len(rows))
+        for _, feature_position, edges, outputs in self.bins:
+            columns = np.array(outputs)[np.searchsorted(edges, numerical[:, feature_position], side='left')]
+            flagged = columns >= 0
+            features[positions[flagged], columns[flagged]] = 1.0
+
+        numerical -= self.mean
+        numerical /= self.scale
+        return features
+
+# Everything loaded from the model files, rebuilt together on reload. `model` is either
+# the pickled sklearn forest or its FlatForest export; `scaler` is only set for the former.
+class Predictor:
+    def __init__(self, model, mean, scale, scaler=None):
+        self.model = model
+        self.scaler = scaler
+        self.pipeline = FeaturePipeline(mean, scale)
+
+def load_pickled_predictor(paths):
+    try:
+        with open(paths["model"], "rb") as file:
+            model = pickle.load(file)
+        with open(paths["scaler"], "rb") as file:
+            scaler = pickle.load(file)
+    except FileNotFoundError:
+        raise FileNotFoundError("Model or scaler file not found. Ensure 'diabetes.pkl' and 'scaler.pkl' are in the 'models/diabetes_prediction' directory.")
+    return Predictor(model, scaler.mean_, scaler.scale_, scaler)
+
+# Returns None when the export is missing or was made from different pickles
+def load_compiled_predictor(paths):
+    if not os.path.exists(paths["compiled"]):
+        return None
+
+    with np.load(paths["compiled"], allow_pickle=False) as file:
+        arrays = dict(file)
+
+    for role in ("model", "scaler"):
+        if not os.path.exists(paths[role]) or str(arrays[f"{role}_sha256"]) != file_sha256(paths[role]):
+            logger.warning("%s is out of date with %s; run 'manage.py export_forest'.", paths["compiled"], paths[role])
+            return None
+
+    return Predictor(FlatForest(arrays), arrays["scaler_mean"], arrays["scaler_scale"])
+
+def load_predictor(paths):
+    return load_compiled_predictor(paths) or load_pickled_predictor(paths)
+
+predictor_paths = {
+    "model": os.path.join(MODEL_DIR, "diabetes.pkl"),
+    "scaler": os.path.join(MODEL_DIR, "scaler.pkl"),
+    "compiled": os.path.join(MODEL_DIR, "diabetes_forest.npz"),
+}
+registry.register("diabetes_prediction", predictor_paths, load_predictor)
+
+# The sklearn model and scaler, for the reference path, parity checks and exports
+@functools.lru_cache(maxsize=1)
+def reference_predictor():
+    return load_pickled_predictor(predictor_paths)
+
+# Loaded on first use; see registry.ModelRegistry
+def get_predictor():
+    return registry.get("diabetes_prediction")
+
+# Turn predict_proba rows into API results, using the same decision rule as model.predict
+def format_results(model, probabilities):
+    predictions = model.classes_.take(np.argmax(probabilities, axis=1))
+    return [
+        {
+            "prediction": "Positive" if prediction == 1 else "Negative",
+            "probability_negative": float(probability[0]),
+            "probability_positive": float(probability[1])
+        }
+        for prediction, probability in zip(predictions, probabilities)
+    ]
+
 # Function to predict diabetes
 def predict_diabetes(data):
-    processed_data = preprocess_input(data)
-    scaled_data = scale_features(processed_data)
-    
-    # Make prediction
-    prediction = model.predict(scaled_data)
-    probability = model.predict_proba(scaled_data)[0]
-    
-    # Prepare the result
-    result = "Positive" if prediction[0] == 1 else "Negative"
-    return {
-        "prediction": result,
-        "probability_negative": float(probability[0]),
-        "probability_positive": float(probability[1])
-    }
\ No newline at end of file
+    predictor = get_predictor()
+    features = predictor.pipeline.transform(data)
+    return format_results(predictor.model, predictor.model.predict_proba(features))[0]
+
+# Function to predict diabetes for many rows with a single model call
+def predict_diabetes_batch(rows):
+    if not rows:
+        return []
+    predictor = get_predictor()
+    features = predictor.pipeline.transform_batch(rows)
+    return format_results(predictor.model, predictor.model.predict_proba(features))
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+# Shared micro-batcher for single-row requests, enabled with PREDICT_BATCHING
+def get_batcher():
+    global _batcher
+    if _batcher is None:
+        from .batching import MicroBatcher
+
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = MicroBatcher(
+                    lambda rows: run_inference(predict_diabetes_batch, rows),
+                    window=settings.PREDICT_BATCH_WINDOW_MS / 1000,
+                    max_batch_size=settings.PREDICT_BATCH_MAX_SIZE,
+                )
+    return _batcher
+
+_prediction_cache = None
+_prediction_cache_lock = threading.Lock()
+
+# Result cache for single-row requests; None when PREDICT_CACHE_SIZE is 0
+def get_prediction_cache():
+    global _prediction_cache
+    if _prediction_cache is None and settings.PREDICT_CACHE_SIZE > 0:
+        with _prediction_cache_lock:
+            if _prediction_cache is None:
+                cache = LRUCache(settings.PREDICT_CACHE_SIZE, ttl=settings.PREDICT_CACHE_TTL or None)
+                registry.on_reload("diabetes_prediction", lambda name, version: cache.clear())
+                _prediction_cache = cache
+    return _prediction_cache
+
+# Model version plus the eight inputs as floats; adding 0.0 folds -0.0 into 0.0. The version
+# comes from the model files, so a web worker whose inference runs in the pool never loads
+# the predictor just to build the key.
+def prediction_cache_key(data):
+    return (registry.file_version("diabetes_prediction"),) + tuple(float(data[col]) + 0.0 for col in numerical_cols)
+
+# Entry point for /api/predict/: result cache, then the micro-batcher or a direct call,
+# either of which scores in the inference pool when INFERENCE_EXECUTOR is enabled
+def serve_prediction(data):
+    cache = get_prediction_cache()
+    if cache is not None:
+        key = prediction_cache_key(data)
+        result = cache.get(key)
+        if result is not None:
+            return dict(result)
+
+    if settings.PREDICT_BATCHING:
+        result = get_batcher().submit(data, settings.INFERENCE_TIMEOUT)
+    else:
+        result = run_inference(predict_diabetes, data)
+
+    if cache is not None:
+        cache.set(key, dict(result))
+    return result
@@ -0,0 +1,172 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+# One registered artifact: the files it is built from and the loader that builds it
+class Artifact:
+    def __init__(self, name, paths, loader):
+        self.name = name
+        self.paths = paths
+        self.loader = loader
+        self.value = None
+        self.loaded = False
+        self.version = None
+        self.hashes = {}
+        self.signatures = {}
+        self.loaded_at = None
+        self.checked_at = 0.0
+        self.file_version = None
+        self.file_version_signatures = None
+        self.file_version_checked_at = 0.0
+        self.lock = threading.Lock()
+
+    def file_signatures(self):
+        signatures = {}
+        for role, path in self.paths.items():
+            try:
+                stat = os.stat(path)
+                signatures[role] = (stat.st_mtime_ns, stat.st_size)
+            except FileNotFoundError:
+                signatures[role] = None
+        return signatures
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def combined_version(hashes):
+    combined = hashlib.sha256()
+    for role in sorted(hashes):
+        combined.update(f"{role}:{hashes[role]}\n".encode())
+    return combined.hexdigest()[:12]
+
+
+# Loads model artifacts on first use, records their hashes and reloads them when the files change
+class ModelRegistry:
+    def __init__(self):
+        self._artifacts = {}
+        self._listeners = {}
+
+    def register(self, name, paths, loader):
+        self._artifacts[name] = Artifact(name, dict(paths), loader)
+
+    def on_reload(self, name, callback):
+        self._listeners.setdefault(name, []).append(callback)
+
+    def names(self):
+        return list(self._artifacts)
+
+    def get(self, name):
+        artifact = self._artifacts[name]
+
+        if not artifact.loaded:
+            with artifact.lock:
+                if not artifact.loaded:
+                    self._load(artifact)
+            return artifact.value
+
+        interval = settings.MODEL_RELOAD_INTERVAL
+        if interval > 0 and time.monotonic() - artifact.checked_at >= interval:
+            # Only one thread checks the files; the others keep serving the current value
+            if artifact.lock.acquire(blocking=False):
+                try:
+                    self._reload_if_changed(artifact)
+                finally:
+                    artifact.lock.release()
+
+        return artifact.value
+
+    def warmup(self, names=None):
+        for name in names or self.names():
+            self.get(name)
+
+    def reload(self, name):
+        artifact = self._artifacts[name]
+        with artifact.lock:
+            self._load(artifact)
+        return artifact.value
+
+    def version(self, name):
+        self.get(name)
+        return self._artifacts[name].version
+
+    # Version of the artifact's files without loading it, for processes that only need to
+    # tag results (e.g. web workers when inference runs in the pool). Files are re-hashed
+    # when their signatures change, checked at most every MODEL_RELOAD_INTERVAL seconds.
+    def file_version(self, name):
+        artifact = self._artifacts[name]
+        if artifact.loaded:
+            return self.version(name)
+
+        interval = settings.MODEL_RELOAD_INTERVAL
+        if artifact.file_version is not None and (
+                interval <= 0 or time.monotonic() - artifact.file_version_checked_at < interval):
+            return artifact.file_version
+
+        with artifact.lock:
+            signatures = artifact.file_signatures()
+            if artifact.file_version is None or signatures != artifact.file_version_signatures:
+                hashes = {role: file_sha256(path) for role, path in artifact.paths.items() if os.path.exists(path)}
+                artifact.file_version = combined_version(hashes)
+                artifact.file_version_signatures = signatures
+            artifact.file_version_checked_at = time.monotonic()
+        return artifact.file_version
+
+    def info(self, name):
+        artifact = self._artifacts[name]
+        return {
+            "name": artifact.name,
+            "loaded": artifact.loaded,
+            "version": artifact.version,
+            "loaded_at": artifact.loaded_at,
+            "files": {
+                role: {"path": path, "sha256": artifact.hashes.get(role)}
+                for role, path in artifact.paths.items()
+            },
+        }
+
+    def _load(self, artifact):
+        signatures = artifact.file_signatures()
+        hashes = {role: file_sha256(path) for role, path in artifact.paths.items() if os.path.exists(path)}
+        value = artifact.loader(artifact.paths)
+
+        was_loaded = artifact.loaded
+
+        artifact.value = value
+        artifact.hashes = hashes
+        artifact.signatures = signatures
+        artifact.version = combined_version(hashes)
+        artifact.loaded_at = time.time()
+        artifact.checked_at = time.monotonic()
+        artifact.loaded = True
+
+        logger.info("Loaded model artifact %s version %s", artifact.name, artifact.version)
+        if was_loaded:
+            for callback in self._listeners.get(artifact.name, []):
+                callback(artifact.name, artifact.version)
+
+    def _reload_if_changed(self, artifact):
+        artifact.checked_at = time.monotonic()
+        if artifact.file_signatures() == artifact.signatures:
+            return
+
+        try:
+            self._load(artifact)
+        except Exception:
+            # A half-written file must not take the running workers down; retry on the next check
+            logger.exception("Reloading model artifact %s failed; keeping version %s", artifact.name, artifact.version)
+
+
+registry = ModelRegistry()
@@ -0,0 +1,197 @@
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, QuerySet, Value
+from django.db.models.functions import Greatest, Least
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import GlucoseDailyRollup, GlucoseHourlyRollup, GlucoseTracking
+
+# Maintenance of the daily and hourly glucose rollups. New readings are added to their
+# buckets as deltas (one UPDATE per bucket); an edited or deleted reading has its buckets
+# recomputed from the readings left in them, which is at most a day of one patient's
+# readings of one type. Saves go through the signals below. bulk_create and
+# QuerySet.update() send no signals, so code using them calls add_readings or
+# refresh_buckets itself. GlucoseTracking.delete() and its QuerySet.delete() go through
+# delete_readings rather than a post_delete receiver, which would make Django load and
+# delete every reading one by one, including when a patient's readings are removed along
+# with the patient (whose rollups cascade anyway).
+
+rollup_periods = {GlucoseDailyRollup: 'day', GlucoseHourlyRollup: 'hour'}
+
+
+# (model, (patient id, glucose type, period start)) of the rollups a reading counts towards.
+# Hours are keyed by their UTC instant: the local wall clock repeats an hour when DST ends.
+def bucket_keys(patient_id, glucose_type, timestamp):
+    local = timezone.localtime(timestamp)
+    hour = local.replace(minute=0, second=0, microsecond=0).astimezone(dt_timezone.utc)
+    return (
+        (GlucoseDailyRollup, (patient_id, glucose_type, local.date())),
+        (GlucoseHourlyRollup, (patient_id, glucose_type, hour)),
+    )
+
+
+def bucket_filter(model, key):
+    patient_id, glucose_type, start = key
+    return {"patient_id": patient_id, "glucose_type": glucose_type, rollup_periods[model]: start}
+
+
+# [start, end) of a bucket's period as aware datetimes
+def bucket_range(model, start):
+    if model is GlucoseDailyRollup:
+        return (timezone.make_aware(datetime.combine(start, time.min)),
+                timezone.make_aware(datetime.combine(start + timedelta(days=1), time.min)))
+    return start, start + timedelta(hours=1)
+
+
+def add_value(totals, value):
+    value = float(value)
+    if not totals:
+        totals.update(count=0, total=0.0, sum_squares=0.0, minimum=value, maximum=value,
+                      below_range=0, in_range=0, above_range=0)
+    totals["count"] += 1
+    totals["total"] += value
+    totals["sum_squares"] += value * value
+    totals["minimum"] = min(totals["minimum"], value)
+    totals["maximum"] = max(totals["maximum"], value)
+    if value < settings.GLUCOSE_TARGET_LOW:
+        totals["below_range"] += 1
+    elif value > settings.GLUCOSE_TARGET_HIGH:
+        totals["above_range"] += 1
+    else:
+        totals["in_range"] += 1
+
+
+# {(model, key): totals} of (patient id, glucose type, value, timestamp) rows
+def bucket_totals(rows):
+    buckets = {}
+    for patient_id, glucose_type, value, timestamp in rows:
+        for bucket in bucket_keys(patient_id, glucose_type, timestamp):
+            add_value(buckets.setdefault(bucket, {}), value)
+    return buckets
+
+
+def reading_rows(readings):
+    return [(reading.patient_id, reading.glucose_type, reading.glucose_value, reading.timestamp) for reading in readings]
+
+
+def increment(model, filters, totals):
+    return model.objects.filter(**filters).update(
+        count=F('count') + totals["count"],
+        total=F('total') + totals["total"],
+        sum_squares=F('sum_squares') + totals["sum_squares"],
+        minimum=Least('minimum', Value(totals["minimum"])),
+        maximum=Greatest('maximum', Value(totals["maximum"])),
+        below_range=F('below_range') + totals["below_range"],
+        in_range=F('in_range') + totals["in_range"],
+        above_range=F('above_range') + totals["above_range"],
+    )
+
+
+# Add newly stored readings to their rollups
+def add_readings(readings):
+    for (model, key), totals in bucket_totals(reading_rows(readings)).items():
+        filters = bucket_filter(model, key)
+        if increment(model, filters, totals):
+            continue
+        try:
+            with transaction.atomic():
+                model.objects.create(**filters, **totals)
+        except IntegrityError:
+            # Another request created the bucket first
+            increment(model, filters, totals)
+
+
+# Recompute the given buckets from the readings stored in them
+def refresh_buckets(buckets):
+    for model, key in set(buckets):
+        patient_id, glucose_type, start = key
+        filters = bucket_filter(model, key)
+        first, end = bucket_range(model, start)
+        totals = {}
+        for value in GlucoseTracking.objects.filter(patient_id=patient_id, glucose_type=glucose_type,
+                                                    timestamp__gte=first, timestamp__lt=end).values_list('glucose_value', flat=True):
+            add_value(totals, value)
+        if totals:
+            model.objects.update_or_create(**filters, defaults=totals)
+        else:
+            model.objects.filter(**filters).delete()
+
+
+# Delete the readings in `queryset` and recompute the buckets they were in. Returns what
+# QuerySet.delete() does.
+def delete_readings(queryset):
+    with transaction.atomic(using=queryset.db):
+        buckets = [bucket for row in queryset.values_list('patient_id', 'glucose_type', 'timestamp')
+                   for bucket in bucket_keys(*row)]
+        # The plain delete: GlucoseTracking's own QuerySet.delete() calls back into here
+        deleted = QuerySet.delete(queryset)
+        refresh_buckets(buckets)
+    return deleted
+
+
+# Drop and recompute the rollups of the given patients (all patients when None) in one pass
+# over their readings. Returns the number of (daily, hourly) rollups written.
+def rebuild_rollups(patient_ids=None, batch_size=1000):
+    readings = GlucoseTracking.objects.order_by('patient_id')
+    if patient_ids is not None:
+        readings = readings.filter(patient_id__in=patient_ids)
+
+    with transaction.atomic():
+        for model in rollup_periods:
+            stale = model.objects.all()
+            if patient_ids is not None:
+                stale = stale.filter(patient_id__in=patient_ids)
+            stale.delete()
+
+        rows = readings.values_list('patient_id', 'glucose_type', 'glucose_value', 'timestamp').iterator(chunk_size=batch_size)
+        written = {model: 0 for model in rollup_periods}
+        for model, rollups in iter_rollups(rows):
+            model.objects.bulk_create(rollups, batch_size=batch_size)
+            written[model] += len(rollups)
+    return written[GlucoseDailyRollup], written[GlucoseHourlyRollup]
+
+
+# (model, rollup objects) per patient of rows ordered by patient, so only one patient's
+# buckets are held in memory at a time
+def iter_rollups(rows):
+    def flush(patient_rows):
+        by_model = {model: [] for model in rollup_periods}
+        for (model, key), totals in bucket_totals(patient_rows).items():
+            by_model[model].append(model(**bucket_filter(model, key), **totals))
+        return by_model.items()
+
+    patient_rows, current = [], None
+    for row in rows:
+        if row[0] != current and patient_rows:
+            yield from flush(patient_rows)
+            patient_rows = []
+        current = row[0]
+        patient_rows.append(row)
+    if patient_rows:
+        yield from flush(patient_rows)
+
+
+@receiver(pre_save, sender=GlucoseTracking)
+def remember_stored_reading(sender, instance, raw=False, **kwargs):
+    # An edit can move the reading to another bucket; remember where it was
+    if not raw and not instance._state.adding and instance.pk is not None:
+        instance._rollup_previous = (GlucoseTracking.objects.filter(pk=instance.pk)
+                                     .values_list('patient_id', 'glucose_type', 'timestamp').first())
+
+
+@receiver(post_save, sender=GlucoseTracking)
+def update_rollups_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        add_readings([instance])
+        return
+    buckets = list(bucket_keys(instance.patient_id, instance.glucose_type, instance.timestamp))
+    previous = instance.__dict__.pop('_rollup_previous', None)
+    if previous:
+        buckets.extend(bucket_keys(*previous))
+    refresh_buckets(buckets)
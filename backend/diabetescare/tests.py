@@ -1,3 +1,1030 @@
-from django.test import TestCase
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from unittest import mock
+from datetime import datetime, timedelta, timezone
 
-# Create your tests here.
+import numpy as np
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models.deletion import Collector
+from django.conf import settings
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import path
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from profiles.models import DoctorPatientRelation, DoctorProfile, PatientProfile
+from . import alternative_medicine, async_views, predict, views
+from .alternative_medicine import Catalog, build_neighbor_table, catalog_paths, get_catalog, read_catalog, suggest_drugs
+from .admin import GlucoseTrackingAdmin
+from .batching import MicroBatcher
+from .cache import LRUCache
+from .catalog_store import update_catalog
+from . import executor
+from .executor import ExecutorSaturated, InferenceExecutor
+from .forest import FlatForest, export_forest
+from .fuzzy import MIN_QUERY_LENGTH, edit_distance, max_edit_distance, trigrams
+from .models import AnalysisImage, GlucoseDailyRollup, GlucoseHourlyRollup, GlucoseTracking
+from .registry import ModelRegistry
+from .rollups import delete_readings, rebuild_rollups
+from .views import format_medical_history, store_glucose_reading
+
+
+# Output of the original DataFrame-based path: preprocess, scale, predict + predict_proba
+def reference_predict(data):
+    model = predict.reference_predictor().model
+    scaled_data = predict.scale_features(predict.preprocess_input(data))
+    prediction = model.predict(scaled_data)
+    probability = model.predict_proba(scaled_data)[0]
+    return {
+        "prediction": "Positive" if prediction[0] == 1 else "Negative",
+        "probability_negative": float(probability[0]),
+        "probability_positive": float(probability[1])
+    }
+
+
+class PredictPipelineParityTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        rng = random.Random(42)
+        cls.rows = [
+            {
+                'Pregnancies': float(rng.randint(0, 12)),
+                'Glucose': rng.uniform(40, 250),
+                'BloodPressure': rng.uniform(40, 120),
+                'SkinThickness': rng.uniform(0, 60),
+                'Insulin': rng.uniform(0, 400),
+                'BMI': rng.uniform(15, 55),
+                'DiabetesPedigreeFunction': rng.uniform(0.05, 2.5),
+                'Age': float(rng.randint(21, 81)),
+            }
+            for _ in range(200)
+        ]
+        # Values on and around every bin edge
+        base = dict(cls.rows[0])
+        for feature, edges in (('BMI', (18.5, 24.9, 29.9, 34.9, 39.9)),
+                               ('Insulin', (16, 166)),
+                               ('Glucose', (70, 99, 126))):
+            for edge in edges:
+                for value in (edge - 0.01, float(edge), edge + 0.01):
+                    cls.rows.append(dict(base, **{feature: value}))
+
+    def test_features_match_reference(self):
+        for row in self.rows:
+            expected = predict.scale_features(predict.preprocess_input(row))
+            np.testing.assert_array_equal(predict.get_predictor().pipeline.transform(row), expected)
+
+    def test_batch_features_match_reference(self):
+        expected = np.vstack([predict.scale_features(predict.preprocess_input(row)) for row in self.rows])
+        np.testing.assert_array_equal(predict.get_predictor().pipeline.transform_batch(self.rows), expected)
+
+    def test_predict_diabetes_matches_reference(self):
+        for row in self.rows:
+            self.assertEqual(predict.predict_diabetes(row), reference_predict(row))
+
+    def test_predict_diabetes_batch_matches_reference(self):
+        expected = [reference_predict(row) for row in self.rows]
+        self.assertEqual(predict.predict_diabetes_batch(self.rows), expected)
+
+
+class FlatForestTests(SimpleTestCase):
+    def test_probabilities_match_sklearn(self):
+        model = predict.reference_predictor().model
+        rng = np.random.default_rng(0)
+        X = rng.normal(scale=2.0, size=(5000, model.n_features_in_))
+        X[:, len(predict.numerical_cols):] = rng.integers(0, 2, size=(5000, len(predict.categorical_cols)))
+
+        forest = FlatForest(export_forest(model))
+        np.testing.assert_array_equal(forest.predict_proba(X), model.predict_proba(X))
+        np.testing.assert_array_equal(forest.predict(X), model.predict(X))
+
+
+class ListQueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('patient', 'patient@example.com', 'password')
+        cls.patient = PatientProfile.objects.create(user=cls.user, first_name='Test', last_name='Patient')
+        other = PatientProfile.objects.create(user=User.objects.create_user('other', 'other@example.com', 'password'))
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        GlucoseTracking.objects.bulk_create([
+            GlucoseTracking(patient=patient, glucose_type=('FBS', 'PPBS', 'RBS')[i % 3], glucose_value=100 + i % 50,
+                            timestamp=start + timedelta(minutes=30 * (i // 2)))
+            for patient in (cls.patient, other) for i in range(300)
+        ])
+        for i in range(30):
+            AnalysisImage.objects.create(patient=cls.patient, image=f'analysis_images/{i}.png')
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest("Query plans are checked on SQLite")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    # EXPLAIN QUERY PLAN of every query the request runs against `table`
+    def query_plans(self, url, table, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        plans = []
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                if f'FROM "{table}"' in query['sql']:
+                    cursor.execute(f"EXPLAIN QUERY PLAN {query['sql']}")
+                    plans.append(" | ".join(row[-1] for row in cursor.fetchall()))
+        self.assertTrue(plans)
+        return response.json(), plans
+
+    def assert_uses_index(self, plans, index):
+        for plan in plans:
+            self.assertIn(f"USING INDEX {index}", plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_glucose_list_pages_use_patient_time_index(self):
+        first, plans = self.query_plans('/api/glucose/list/', 'diabetescare_glucosetracking', {'limit': 20})
+        self.assert_uses_index(plans, 'glucose_patient_time_idx')
+
+        for params in ({'limit': 20, 'before': first['next']}, {'limit': 20, 'after': first['next']}):
+            _, plans = self.query_plans('/api/glucose/list/', 'diabetescare_glucosetracking', params)
+            self.assert_uses_index(plans, 'glucose_patient_time_idx')
+            self.assertIn("timestamp", plans[0].split("USING INDEX")[1])
+
+    def test_unpaged_request_returns_full_listing(self):
+        body, plans = self.query_plans('/api/glucose/list/', 'diabetescare_glucosetracking')
+        self.assert_uses_index(plans, 'glucose_patient_time_idx')
+        self.assertEqual(len(body['data']), 300)
+        self.assertEqual((body['next'], body['previous']), (None, None))
+
+        self.assertEqual(len(self.client.get('/api/my-analysis/').json()['data']), 30)
+
+    def test_analysis_list_uses_patient_uploaded_index(self):
+        first, plans = self.query_plans('/api/my-analysis/', 'diabetescare_analysisimage', {'limit': 10})
+        self.assert_uses_index(plans, 'analysis_patient_uploaded_idx')
+        _, plans = self.query_plans('/api/my-analysis/', 'diabetescare_analysisimage', {'limit': 10, 'before': first['next']})
+        self.assert_uses_index(plans, 'analysis_patient_uploaded_idx')
+
+    def test_glucose_type_history_uses_patient_type_time_index(self):
+        readings = GlucoseTracking.objects.filter(patient=self.patient, glucose_type='FBS').order_by('-timestamp')
+        self.assert_uses_index([readings.explain()], 'glucose_patient_type_time_idx')
+
+    def test_pages_cover_every_reading_once(self):
+        expected = list(GlucoseTracking.objects.filter(patient=self.patient).order_by('-timestamp', '-id')
+                        .values_list('glucose_value', 'timestamp'))
+        pages, cursor = [], None
+        while True:
+            response = self.client.get('/api/glucose/list/', {'limit': 7, **({'before': cursor} if cursor else {})}).json()
+            pages.append(response)
+            cursor = response['next']
+            if not cursor:
+                break
+        seen = [(row['glucose_value'], row['timestamp']) for page in pages for row in page['data']]
+        self.assertEqual(len(seen), len(expected))
+        self.assertEqual(seen, [(value, timestamp.isoformat().replace('+00:00', 'Z')) for value, timestamp in expected])
+
+        # Walking back from the last page with `after` yields the same pages
+        cursor, previous_pages = pages[-1]['previous'], []
+        while cursor:
+            response = self.client.get('/api/glucose/list/', {'limit': 7, 'after': cursor}).json()
+            previous_pages.insert(0, response['data'])
+            cursor = response['previous']
+        self.assertEqual(previous_pages, [page['data'] for page in pages[:-1]])
+
+
+class MicroBatcherTests(SimpleTestCase):
+    def run_concurrently(self, batcher, items, timeout=5):
+        results = [None] * len(items)
+
+        def submit(i):
+            try:
+                results[i] = batcher.submit(items[i], timeout)
+            except Exception as e:
+                results[i] = e
+
+        threads = [threading.Thread(target=submit, args=(i,)) for i in range(len(items))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_full_batch_flushes_before_window(self):
+        batches = []
+        batcher = MicroBatcher(lambda items: batches.append(list(items)) or [item * 2 for item in items],
+                               window=30, max_batch_size=4)
+        started = time.perf_counter()
+        self.assertEqual(sorted(self.run_concurrently(batcher, [1, 2, 3, 4])), [2, 4, 6, 8])
+        self.assertLess(time.perf_counter() - started, 5)
+        self.assertEqual([sorted(batch) for batch in batches], [[1, 2, 3, 4]])
+
+    def test_window_flushes_partial_batch(self):
+        batches = []
+        batcher = MicroBatcher(lambda items: batches.append(list(items)) or list(items), window=0.05, max_batch_size=64)
+        started = time.perf_counter()
+        self.assertEqual(batcher.submit("row", 5), "row")
+        self.assertGreaterEqual(time.perf_counter() - started, 0.05)
+        self.assertEqual(batches, [["row"]])
+        self.assertEqual(batcher.metrics()["batches"], 1)
+
+    def test_short_result_list_fails_every_request(self):
+        batcher = MicroBatcher(lambda items: list(items)[:-1], window=30, max_batch_size=3)
+        results = self.run_concurrently(batcher, [1, 2, 3])
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results), results)
+
+    def test_handler_errors_reach_every_request(self):
+        def handler(items):
+            raise ValueError("bad batch")
+
+        batcher = MicroBatcher(handler, window=30, max_batch_size=2)
+        results = self.run_concurrently(batcher, [1, 2])
+        self.assertTrue(all(isinstance(result, ValueError) for result in results), results)
+
+    def test_slow_handler_times_out(self):
+        batcher = MicroBatcher(lambda items: time.sleep(0.5) or list(items), window=0, max_batch_size=1)
+        with self.assertRaises(ExecutorSaturated):
+            batcher.submit(1, 0.05)
+
+
+class LRUCacheTests(SimpleTestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.get("a"), cache.get("c")), (1, 3))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_entries_expire(self):
+        cache = LRUCache(2, ttl=0.01)
+        cache.set("a", 1)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["expirations"], 1)
+
+    def test_model_reload_clears_prediction_cache(self):
+        previous, predict._prediction_cache = predict._prediction_cache, None
+        try:
+            with override_settings(PREDICT_CACHE_SIZE=10):
+                cache = predict.get_prediction_cache()
+            cache.set("key", {"prediction": "Negative"})
+            predict.get_predictor()
+            predict.registry.reload("diabetes_prediction")
+            self.assertIsNone(cache.get("key"))
+            self.assertEqual(cache.stats()["invalidations"], 1)
+        finally:
+            predict._prediction_cache = previous
+
+
+@override_settings(INFERENCE_EXECUTOR=True, PREDICT_CACHE_SIZE=0, PREDICT_BATCHING=False)
+class InferenceExecutorTests(TestCase):
+    row = {'Pregnancies': 2, 'Glucose': 120, 'BloodPressure': 70, 'SkinThickness': 20, 'Insulin': 80,
+           'BMI': 32.0, 'DiabetesPedigreeFunction': 0.5, 'Age': 40}
+
+    def setUp(self):
+        # A pool with its only slot taken: submit() must refuse without starting processes
+        self.executor = InferenceExecutor(workers=1, max_pending=1, timeout=1, start_method='spawn')
+        self.executor._slots.acquire()
+        previous, executor._executor = executor._executor, self.executor
+        self.addCleanup(setattr, executor, '_executor', previous)
+
+        user = User.objects.create_user('patient', 'patient@example.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def test_saturated_pool_refuses_work(self):
+        with self.assertRaises(ExecutorSaturated):
+            self.executor.submit(predict.predict_diabetes, self.row)
+        self.assertIsNone(self.executor._pool)
+
+    def test_saturation_is_a_503(self):
+        response = self.client.post('/api/predict/', self.row, format='json')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
+        self.assertIn("saturated", response.json()["error"])
+
+
+class RegistryFileVersionTests(SimpleTestCase):
+    def test_file_version_does_not_load_and_matches_version(self):
+        loads = []
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "model.bin")
+            with open(path, "wb") as file:
+                file.write(b"weights")
+            registry = ModelRegistry()
+            registry.register("model", {"model": path}, lambda paths: loads.append(paths) or "model")
+
+            version = registry.file_version("model")
+            self.assertEqual(loads, [])
+            self.assertEqual(registry.version("model"), version)
+            self.assertEqual(len(loads), 1)
+
+
+# Plain Levenshtein DP; the last row holds the distance from `a` to every prefix of `b`
+def levenshtein_row(a, b):
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, char_b in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+        previous = current
+    return previous
+
+
+class DrugSuggestionTests(TestCase):
+    names = ["Metformin", "metformin", "Metformin XR", "Metformin", "Met", "Aspirin", "X\U0010ffffA", "X\U0010ffff"]
+
+    def setUp(self):
+        medicine_data = {"Drug Name": dict(enumerate(self.names))}
+        self.catalog = Catalog(medicine_data, np.eye(len(self.names)))
+
+    def suggest(self, query, limit=None, offset=0):
+        with mock.patch('diabetescare.alternative_medicine.get_catalog', return_value=self.catalog):
+            return suggest_drugs(query, limit, offset)
+
+    def test_exact_match_first_and_duplicates_once(self):
+        self.assertEqual(self.suggest("MET"), ["Met", "Metformin", "metformin", "Metformin XR"])
+        self.assertEqual(self.suggest("metformin"), ["Metformin", "metformin", "Metformin XR"])
+        self.assertEqual(self.suggest(""), sorted(set(self.names), key=lambda name: (name.lower(), name)))
+        self.assertEqual(self.suggest("metz"), [])
+
+    def test_limit_and_offset(self):
+        self.assertEqual(self.suggest("met", limit=2), ["Met", "Metformin"])
+        self.assertEqual(self.suggest("met", limit=2, offset=1), ["Metformin", "metformin"])
+        self.assertEqual(self.suggest("met", limit=2, offset=3), ["Metformin XR"])
+        self.assertEqual(self.suggest("met", limit=2, offset=4), [])
+
+    def test_query_ending_in_last_code_point(self):
+        self.assertEqual(self.suggest("x\U0010ffff"), ["X\U0010ffff", "X\U0010ffffA"])
+
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('patient', 'patient@example.com', 'password'))
+        response = client.get('/api/drug-suggestions/', {'query': "\U0010ffff"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [])
+
+    def test_prefix_range_matches_scan(self):
+        catalog = get_catalog()
+        rng = random.Random(11)
+        queries = ["", "a", "zzz", "\U0010ffff"] + [name.lower()[:rng.randint(1, 6)] for name in rng.sample(catalog.drug_names, 50)]
+        for query in queries:
+            start, end = catalog.prefix_range(query)
+            expected = [key for key in catalog.prefix_keys if key.startswith(query.lower())]
+            self.assertEqual(catalog.prefix_keys[start:end], expected, query)
+
+
+class PrerenderedRecommendationTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('patient', 'patient@example.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def reload_catalog(self, prerender):
+        with override_settings(ALTERNATIVE_MEDICINE_PRERENDER=prerender):
+            return predict.registry.reload("alternative_medicine")
+
+    def test_prerendered_bodies_match_dynamic_responses(self):
+        catalog = self.reload_catalog(True)
+        self.addCleanup(self.reload_catalog, settings.ALTERNATIVE_MEDICINE_PRERENDER)
+        self.assertEqual(len(catalog.rendered), len(catalog.records))
+
+        renderer = JSONRenderer()
+        for name in catalog.name_index:
+            prerendered = alternative_medicine.prerendered_recommendation(name, alternative_medicine.DEFAULT_K)
+            self.assertEqual(prerendered, renderer.render(alternative_medicine.recommend_info(name)), name)
+
+        # Through the view: the prerendered response against the same catalog without it
+        names = list(catalog.name_index)
+        prerendered = [self.client.get('/api/alternative-medicine/', {'drug_name': name}) for name in names]
+        self.reload_catalog(False)
+        for name, response in zip(names, prerendered):
+            dynamic = self.client.get('/api/alternative-medicine/', {'drug_name': name})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, dynamic.content, name)
+            self.assertEqual(response["Content-Type"], dynamic["Content-Type"])
+            self.assertEqual(response["ETag"], dynamic["ETag"])
+
+    def test_line_separators_escaped_like_drf(self):
+        medicine_data = {
+            "Drug Name": {0: "A", 1: "B\u2028"},
+            "Description": {0: "first\u2028line", 1: "para\u2029graph \u00e9"},
+        }
+        catalog = Catalog(medicine_data, np.array([[1.0, 0.5], [0.5, 1.0]]))
+        for index, body in enumerate(alternative_medicine.render_recommendations(catalog, 1)):
+            expected = alternative_medicine.recommendations(catalog, catalog.neighbors(index, 1))
+            self.assertEqual(body, JSONRenderer().render(expected))
+
+
+class FuzzySearchTests(SimpleTestCase):
+    def mutate(self, rng, text, edits):
+        chars = list(text)
+        for _ in range(edits):
+            position = rng.randrange(len(chars) + 1)
+            operation = rng.randrange(3)
+            if operation == 0:
+                chars.insert(position, rng.choice("abcdefghijklmnopqrstuvwxyz "))
+            elif position < len(chars):
+                if operation == 1:
+                    del chars[position]
+                else:
+                    chars[position] = rng.choice("abcdefghijklmnopqrstuvwxyz ")
+        return "".join(chars)
+
+    def test_edit_distance_matches_levenshtein(self):
+        rng = random.Random(0)
+        for _ in range(3000):
+            a = "".join(rng.choice("abc") for _ in range(rng.randint(0, 8)))
+            b = "".join(rng.choice("abc") for _ in range(rng.randint(0, 8)))
+            limit = rng.randint(0, 3)
+            row = levenshtein_row(a, b)
+            self.assertEqual(edit_distance(a, b, limit), min(row[-1], limit + 1))
+            self.assertEqual(edit_distance(a, b, limit, prefix=True), min(min(row), limit + 1))
+
+    def test_search_matches_exhaustive_scan(self):
+        index = get_catalog().fuzzy_index
+        rng = random.Random(1)
+        for trial in range(150):
+            prefix = trial % 2 == 1
+            key = rng.choice(index.keys)
+            query = self.mutate(rng, key[:rng.randint(3, 10)] if prefix else key, rng.randint(0, 3))
+            if len(query) < MIN_QUERY_LENGTH:
+                continue
+
+            limit = max_edit_distance(query)
+            grams = trigrams(query, prefix)
+            expected = []
+            for key_id, candidate in enumerate(index.keys):
+                row = levenshtein_row(query, candidate)
+                distance = min(row) if prefix else row[-1]
+                if distance <= limit:
+                    expected.append((distance, -len(grams & trigrams(candidate)), candidate, key_id))
+            expected = [key_id for *_, key_id in sorted(expected)]
+
+            self.assertEqual(index.search(query, prefix), expected, (query, prefix))
+
+    def exhaustive_search(self, index, query, prefix):
+        limit = max_edit_distance(query)
+        grams = trigrams(query, prefix)
+        expected = []
+        for key_id, candidate in enumerate(index.keys):
+            row = levenshtein_row(query, candidate)
+            distance = min(row) if prefix else row[-1]
+            if distance <= limit:
+                expected.append((distance, -len(grams & trigrams(candidate)), candidate, key_id))
+        return [key_id for *_, key_id in sorted(expected)]
+
+    def test_short_prefix_queries_check_few_candidates(self):
+        index = get_catalog().fuzzy_index
+        rng = random.Random(2)
+        queries = {"met", "xyz", "oly", "aaa", "a a", "   "} | {key[:3] for key in index.keys if len(key) >= 3}
+        queries |= {self.mutate(rng, query, 1)[:3] for query in sorted(queries)}
+        counts = []
+        for query in sorted(query for query in queries if len(query) == MIN_QUERY_LENGTH):
+            key_ids, _ = index.candidates(query, True, max_edit_distance(query))
+            self.assertEqual(index.search(query, True), self.exhaustive_search(index, query, True), query)
+            # Keys found through the prefix's deletion neighbours, not every key
+            self.assertLessEqual(len(key_ids), len(index.keys) // 3, query)
+            counts.append(len(key_ids))
+        self.assertLess(sum(counts) / len(counts), len(index.keys) / 10)
+        self.assertEqual(len(index.candidates("xyz", True, 1)[0]), 0)
+
+    def test_repetitive_queries_match_exhaustive_scan(self):
+        index = get_catalog().fuzzy_index
+        for query in ("aaaa", "aaaaaaa", "abababab", "ininininin", "a a a a a a a a a a a a"):
+            for prefix in (False, True):
+                self.assertEqual(index.search(query, prefix), self.exhaustive_search(index, query, prefix), (query, prefix))
+
+
+class CatalogUpdateTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.paths = {role: os.path.join(directory, os.path.basename(source)) for role, source in catalog_paths.items()}
+        for role, source in catalog_paths.items():
+            if os.path.exists(source):
+                shutil.copy(source, self.paths[role])
+
+    def assert_table_matches_rebuild(self):
+        medicine_data, similarity, (indices, scores) = read_catalog(self.paths)
+        width = min(settings.ALTERNATIVE_MEDICINE_TOP_K + 1, len(similarity))
+        expected_indices, expected_scores = build_neighbor_table(np.asarray(similarity), width)
+        np.testing.assert_array_equal(indices, expected_indices)
+        np.testing.assert_array_equal(scores, expected_scores)
+        return medicine_data, similarity
+
+    def test_neighbor_table_matches_rebuild_after_appends_and_tag_updates(self):
+        medicine_data, _, _ = read_catalog(self.paths)
+        names, tags = medicine_data["Drug Name"], medicine_data["tags"]
+        n = len(names)
+
+        # The original pickles have no neighbour table; the first version builds it in full
+        summary = update_catalog([{"Drug Name": names[0], "Description": "First published version"}],
+                                 paths=self.paths, keep=2)
+        self.assertEqual((summary["recomputed"], summary["reranked"]), (0, n))
+        self.assert_table_matches_rebuild()
+
+        # New drugs close to existing ones enter many rows' top k (the merge path); changed
+        # tags drop drugs out of rows that listed them (the re-rank path)
+        summary = update_catalog([
+            {"Drug Name": "Test Drug A", "tags": tags[0]},
+            {"Drug Name": "Test Drug B", "tags": f"{tags[1]} {tags[2]}"},
+            {"Drug Name": "Test Drug C", "tags": "entirely unrelated words"},
+            {"Drug Name": names[3], "tags": tags[10]},
+            {"Drug Name": names[4], "tags": "nothing in common"},
+        ], paths=self.paths, keep=2)
+        self.assertEqual((summary["appended"], summary["updated"], summary["recomputed"]), (3, 2, 5))
+        self.assertGreater(summary["reranked"], 5)
+        self.assertLess(summary["reranked"], n + 3)
+        medicine_data, similarity = self.assert_table_matches_rebuild()
+        self.assertEqual(len(similarity), n + 3)
+        self.assertEqual(medicine_data["Drug Name"][n], "Test Drug A")
+
+        # The next update starts from the version and table the previous one published
+        update_catalog([
+            {"Drug Name": "Test Drug A", "tags": tags[5]},
+            {"Drug Name": names[0], "Description": "Only the description changes"},
+            {"Drug Name": "Test Drug D", "tags": tags[7]},
+        ], paths=self.paths, keep=2)
+        medicine_data, similarity = self.assert_table_matches_rebuild()
+        self.assertEqual(len(similarity), n + 4)
+        self.assertEqual(medicine_data["Description"][0], "Only the description changes")
+        self.assertEqual(len(os.listdir(os.path.join(os.path.dirname(self.paths["manifest"]), "versions"))), 2)
+
+
+class MedicalHistoryTests(TestCase):
+    def setUp(self):
+        self.patients = [
+            PatientProfile.objects.create(user=User.objects.create_user(f'patient{i}', f'patient{i}@example.com', 'password'))
+            for i in range(2)
+        ]
+
+    # The history a full rebuild from the stored readings produces
+    def rebuilt_history(self, patient, window=0):
+        readings = list(GlucoseTracking.objects.filter(patient=patient).order_by('timestamp', 'id'))
+        return format_medical_history(readings[-window:] if window else readings)
+
+    def add_readings(self, minutes, window=0):
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        rng = random.Random(0)
+        for i, (patient, minute) in enumerate(minutes):
+            store_glucose_reading(patient, {
+                "glucose_type": rng.choice(('FBS', 'PPBS', 'RBS')),
+                "glucose_value": float(rng.randint(40, 300)),
+                # Alternate UTC offsets; the history is written in UTC
+                "timestamp": (start + timedelta(minutes=minute)).astimezone(
+                    timezone(timedelta(hours=i % 3 - 1))),
+            })
+            for each in self.patients:
+                each.refresh_from_db()
+                if each.glucose_readings.exists():
+                    self.assertEqual(each.medical_history, self.rebuilt_history(each, window))
+
+    def test_in_order_inserts_append(self):
+        self.add_readings([(self.patients[0], minute) for minute in range(0, 300, 15)])
+
+    def test_backdated_and_tied_inserts_rebuild(self):
+        self.add_readings([(self.patients[0], minute) for minute in (50, 10, 90, 90, 30, 120, 5, 120)])
+
+    def test_interleaved_patients(self):
+        self.add_readings([(self.patients[i % 2], minute) for i, minute in enumerate((0, 5, 10, 3, 20, 15, 25, 1))])
+
+    def test_window_keeps_newest_readings(self):
+        with override_settings(MEDICAL_HISTORY_MAX_READINGS=4):
+            self.add_readings([(self.patients[0], minute) for minute in (0, 10, 20, 30, 40, 35, 50, 5, 60)], window=4)
+
+    def test_stale_profile_does_not_drop_lines(self):
+        # Two requests for one patient that loaded the profile before either saved
+        first = PatientProfile.objects.get(pk=self.patients[0].pk)
+        second = PatientProfile.objects.get(pk=self.patients[0].pk)
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        for minute, (patient, value) in enumerate(((first, 90.0), (second, 111.0), (first, 222.0))):
+            store_glucose_reading(patient, {"glucose_type": 'FBS', "glucose_value": value,
+                                            "timestamp": start + timedelta(minutes=minute)})
+        self.patients[0].refresh_from_db()
+        self.assertEqual(self.patients[0].medical_history, self.rebuilt_history(self.patients[0]))
+        self.assertEqual(self.patients[0].medical_history.count("\n"), 3)
+
+    def test_append_leaves_history_text_in_database(self):
+        self.add_readings([(self.patients[0], minute) for minute in (0, 10)])
+        patient = self.patients[0]
+        with CaptureQueriesContext(connection) as queries:
+            store_glucose_reading(patient, {"glucose_type": 'FBS', "glucose_value": 95.0,
+                                            "timestamp": datetime(2025, 1, 2, tzinfo=timezone.utc)})
+        selects = [query["sql"] for query in queries.captured_queries if query["sql"].startswith("SELECT")]
+        self.assertFalse([sql for sql in selects if "medical_history" in sql], selects)
+        self.assertIn("medical_history", patient.get_deferred_fields())
+        self.assertEqual(patient.medical_history, self.rebuilt_history(patient))
+
+
+class BulkGlucoseReadingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('patient', 'patient@example.com', 'password')
+        self.patient = PatientProfile.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_mixed_payload_stores_valid_rows_and_reports_invalid_ones(self):
+        readings = [
+            {"glucose_type": "FBS", "glucose_value": 95, "timestamp": "2025-01-01T07:00:00Z"},
+            {"glucose_type": "XYZ", "glucose_value": 95, "timestamp": "2025-01-01T07:30:00Z"},
+            {"glucose_type": "PPBS", "glucose_value": 180, "timestamp": "2025-01-01T09:00:00Z"},
+            {"glucose_type": "RBS", "timestamp": "2025-01-01T10:00:00Z"},
+            {"glucose_type": "RBS", "glucose_value": 60, "timestamp": "2025-01-01T09:30:00+01:00"},
+        ]
+        response = self.client.post('/api/glucose/add/bulk/', {"readings": readings}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        body = response.json()
+        self.assertEqual(body["accepted"], [0, 2, 4])
+        self.assertEqual([rejected["index"] for rejected in body["rejected"]], [1, 3])
+        self.assertIn("glucose_type", body["rejected"][0]["errors"])
+        self.assertIn("glucose_value", body["rejected"][1]["errors"])
+        self.assertEqual(len(body["data"]), 3)
+        self.assertEqual(GlucoseTracking.objects.filter(patient=self.patient).count(), 3)
+
+        self.patient.refresh_from_db()
+        self.assertEqual(self.patient.medical_history, format_medical_history(
+            GlucoseTracking.objects.filter(patient=self.patient).order_by('timestamp', 'id')))
+        self.assertIn("60.0 mg/dL on 2025-01-01 08:30", self.patient.medical_history)
+
+        daily = GlucoseDailyRollup.objects.get(patient=self.patient, glucose_type='RBS')
+        self.assertEqual((daily.count, daily.total, daily.below_range), (1, 60.0, 1))
+        self.assertEqual(GlucoseHourlyRollup.objects.filter(patient=self.patient).count(), 3)
+
+    def test_all_invalid_payload_is_rejected(self):
+        response = self.client.post('/api/glucose/add/bulk/', [
+            {"glucose_type": "XYZ", "glucose_value": 95, "timestamp": "2025-01-01T07:00:00Z"},
+            {"glucose_type": "FBS", "glucose_value": 95},
+        ], format='json')
+
+        self.assertEqual(response.status_code, 400)
+        body = response.json()
+        self.assertEqual(body["accepted"], [])
+        self.assertEqual([rejected["index"] for rejected in body["rejected"]], [0, 1])
+        self.assertFalse(GlucoseTracking.objects.exists())
+        self.assertFalse(GlucoseDailyRollup.objects.exists())
+
+    def test_empty_and_oversized_payloads_are_rejected(self):
+        self.assertEqual(self.client.post('/api/glucose/add/bulk/', [], format='json').status_code, 400)
+        with override_settings(GLUCOSE_BULK_MAX_READINGS=2):
+            reading = {"glucose_type": "FBS", "glucose_value": 95, "timestamp": "2025-01-01T07:00:00Z"}
+            response = self.client.post('/api/glucose/add/bulk/', [reading] * 3, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(GlucoseTracking.objects.exists())
+
+
+class GlucoseStatisticsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('patient', 'patient@example.com', 'password')
+        self.patient = PatientProfile.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add(self, glucose_type, value, timestamp):
+        return GlucoseTracking.objects.create(patient=self.patient, glucose_type=glucose_type,
+                                              glucose_value=value, timestamp=timestamp)
+
+    def statistics(self, params, client=None):
+        response = (client or self.client).get('/api/glucose/statistics/', params)
+        return response.status_code, response.json()
+
+    # The same figures computed one reading at a time
+    def reference(self, values):
+        mean = statistics.fmean(values)
+        sd = statistics.pstdev(values)
+        return {
+            "count": len(values),
+            "mean": round(mean, 2),
+            "sd": round(sd, 2),
+            "cv": round(sd / mean * 100, 2),
+            "gmi": round(3.31 + 0.02392 * mean, 2),
+            "min": min(values),
+            "max": max(values),
+            "time_below_range": round(sum(value < 70 for value in values) / len(values) * 100, 2),
+            "time_in_range": round(sum(70 <= value <= 180 for value in values) / len(values) * 100, 2),
+            "time_above_range": round(sum(value > 180 for value in values) / len(values) * 100, 2),
+        }
+
+    def test_matches_python_reference(self):
+        rng = random.Random(3)
+        start = datetime(2025, 3, 1, tzinfo=timezone.utc)
+        for i in range(400):
+            self.add(rng.choice(('FBS', 'PPBS', 'RBS')), float(rng.randint(40, 320)),
+                     start + timedelta(minutes=rng.randint(0, 6 * 24 * 60)))
+        readings = list(GlucoseTracking.objects.filter(timestamp__date__lte='2025-03-05'))
+
+        for from_rollups in (False, True):
+            with override_settings(GLUCOSE_STATISTICS_FROM_ROLLUPS=from_rollups):
+                status_code, body = self.statistics({'start': '2025-03-01', 'end': '2025-03-05'})
+            self.assertEqual(status_code, 200)
+            data = body['data']
+            self.assertEqual(data['overall']['summary'], self.reference([r.glucose_value for r in readings]))
+            for glucose_type, _ in GlucoseTracking.GLUCOSE_TYPES:
+                of_type = [r for r in readings if r.glucose_type == glucose_type]
+                series = data['by_type'][glucose_type]
+                self.assertEqual(series['summary'], self.reference([r.glucose_value for r in of_type]))
+                expected_days = sorted({r.timestamp.date() for r in of_type})
+                self.assertEqual([day['date'] for day in series['days']], [day.isoformat() for day in expected_days])
+                for day in series['days']:
+                    values = [r.glucose_value for r in of_type if r.timestamp.date().isoformat() == day['date']]
+                    self.assertEqual({key: value for key, value in day.items() if key != 'date'}, self.reference(values))
+
+    # Reading counts per day, which must agree between readings and rollups
+    def day_counts(self, params):
+        results = []
+        for from_rollups in (False, True):
+            with override_settings(GLUCOSE_STATISTICS_FROM_ROLLUPS=from_rollups):
+                status_code, body = self.statistics(params)
+            self.assertEqual(status_code, 200)
+            results.append({day['date']: day['count'] for day in body['data']['overall']['days']})
+        from_readings, from_rollups = results
+        self.assertEqual(from_readings, from_rollups)
+        return from_readings
+
+    def test_reading_at_local_midnight_starts_the_day(self):
+        with override_settings(TIME_ZONE='Asia/Tokyo'):
+            # 2025-03-02 00:00 in Tokyo, and the instant before it
+            self.add('FBS', 100, datetime(2025, 3, 1, 15, 0, tzinfo=timezone.utc))
+            self.add('FBS', 100, datetime(2025, 3, 1, 14, 59, 59, 999999, tzinfo=timezone.utc))
+            self.assertEqual(self.day_counts({'start': '2025-03-01', 'end': '2025-03-02'}),
+                             {'2025-03-01': 1, '2025-03-02': 1})
+
+    def test_days_across_dst_changes(self):
+        with override_settings(TIME_ZONE='Europe/Berlin'):
+            # 2025-03-30 has 23 hours: it starts at 23:00 UTC the day before and ends at 22:00 UTC
+            for moment in (datetime(2025, 3, 29, 23, 0), datetime(2025, 3, 30, 21, 59), datetime(2025, 3, 30, 22, 0)):
+                self.add('RBS', 120, moment.replace(tzinfo=timezone.utc))
+            self.assertEqual(self.day_counts({'start': '2025-03-30', 'end': '2025-03-31'}),
+                             {'2025-03-30': 2, '2025-03-31': 1})
+
+            # 2025-10-26 has 25 hours: it starts at 22:00 UTC the day before and ends at 23:00 UTC
+            for moment in (datetime(2025, 10, 25, 22, 0), datetime(2025, 10, 26, 22, 59), datetime(2025, 10, 26, 23, 0)):
+                self.add('RBS', 120, moment.replace(tzinfo=timezone.utc))
+            self.assertEqual(self.day_counts({'start': '2025-10-26', 'end': '2025-10-27'}),
+                             {'2025-10-26': 2, '2025-10-27': 1})
+
+    def test_window_without_readings(self):
+        self.add('FBS', 100, datetime(2025, 3, 1, 8, 0, tzinfo=timezone.utc))
+        for from_rollups in (False, True):
+            with override_settings(GLUCOSE_STATISTICS_FROM_ROLLUPS=from_rollups):
+                status_code, body = self.statistics({'start': '2025-04-01', 'end': '2025-04-14'})
+            self.assertEqual(status_code, 200)
+            self.assertEqual(body['data']['overall'], {"summary": {"count": 0}, "days": []})
+            for series in body['data']['by_type'].values():
+                self.assertEqual(series, {"summary": {"count": 0}, "days": []})
+
+    def test_invalid_windows(self):
+        for params in ({'start': '2025-02-30'}, {'start': 'yesterday'}, {'end': '2025-13-01'},
+                       {'start': '2025-03-10', 'end': '2025-03-01'},
+                       {'start': '2024-01-01', 'end': '2025-12-31'}):
+            status_code, body = self.statistics(params)
+            self.assertEqual(status_code, 400, params)
+            self.assertIn("error", body)
+
+    def test_doctor_access(self):
+        self.add('FBS', 100, datetime(2025, 3, 1, 8, 0, tzinfo=timezone.utc))
+        doctor = User.objects.create_user('doctor', 'doctor@example.com', 'password')
+        DoctorProfile.objects.create(user=doctor)
+        client = APIClient()
+        client.force_authenticate(doctor)
+        params = {'patient_id': self.user.id, 'start': '2025-03-01', 'end': '2025-03-01'}
+
+        self.assertEqual(self.statistics(params, client)[0], 403)
+        DoctorPatientRelation.objects.create(doctor=doctor, patient=self.user, status='accepted')
+        status_code, body = self.statistics(params, client)
+        self.assertEqual(status_code, 200)
+        self.assertEqual(body['data']['overall']['summary']['count'], 1)
+
+        self.assertEqual(self.statistics({**params, 'patient_id': 999999}, client)[0], 404)
+        self.assertEqual(self.statistics(params)[0], 403)
+        self.assertEqual(self.statistics({'start': '2025-03-01'}, client)[0], 403)
+
+
+class GlucoseRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('patient', 'patient@example.com', 'password')
+        self.patient = PatientProfile.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.rng = random.Random(5)
+        self.start = datetime(2025, 3, 1, tzinfo=timezone.utc)
+
+    def reading(self):
+        return {
+            "glucose_type": self.rng.choice(('FBS', 'PPBS', 'RBS')),
+            "glucose_value": float(self.rng.randint(40, 320)),
+            "timestamp": self.start + timedelta(minutes=self.rng.randint(0, 3 * 24 * 60)),
+        }
+
+    def post_bulk(self, count):
+        return self.client.post('/api/glucose/add/bulk/', [
+            {**reading, "timestamp": reading["timestamp"].isoformat()} for reading in (self.reading() for _ in range(count))
+        ], format='json')
+
+    def snapshot(self):
+        return {model: sorted(model.objects.values_list('patient_id', 'glucose_type', period, 'count', 'total',
+                                                        'sum_squares', 'minimum', 'maximum', 'below_range',
+                                                        'in_range', 'above_range'))
+                for model, period in ((GlucoseDailyRollup, 'day'), (GlucoseHourlyRollup, 'hour'))}
+
+    # The incrementally maintained rollups equal a rebuild from the readings
+    def assertRollupsRebuilt(self):
+        incremental = self.snapshot()
+        rebuild_rollups()
+        self.assertEqual(incremental, self.snapshot())
+        self.assertTrue(incremental[GlucoseDailyRollup] or not GlucoseTracking.objects.exists())
+
+    def test_add_bulk_add_edit_and_delete(self):
+        for _ in range(30):
+            store_glucose_reading(self.patient, self.reading())
+        self.assertRollupsRebuilt()
+
+        self.assertEqual(self.post_bulk(40).status_code, 201)
+        self.assertRollupsRebuilt()
+
+        # Edits that keep the bucket, change the type, and move to another day
+        readings = list(GlucoseTracking.objects.order_by('id')[:3])
+        readings[0].glucose_value = 400.0
+        readings[1].glucose_type = next(t for t in ('FBS', 'PPBS', 'RBS') if t != readings[1].glucose_type)
+        readings[2].timestamp += timedelta(days=1, minutes=7)
+        for reading in readings:
+            reading.save()
+        self.assertRollupsRebuilt()
+
+        doomed = GlucoseTracking.objects.order_by('id')[::4]
+        deleted, _ = GlucoseTracking.objects.filter(pk__in=[r.pk for r in doomed]).delete()
+        self.assertEqual(deleted, len(doomed))
+        self.assertRollupsRebuilt()
+
+        reading = GlucoseTracking.objects.last()
+        self.assertEqual(reading.delete()[0], 1)
+        self.assertIsNone(reading.pk)
+        self.assertRollupsRebuilt()
+
+        model_admin = GlucoseTrackingAdmin(GlucoseTracking, admin.site)
+        model_admin.delete_model(None, GlucoseTracking.objects.first())
+        self.assertRollupsRebuilt()
+        model_admin.delete_queryset(None, GlucoseTracking.objects.filter(glucose_type='FBS'))
+        self.assertRollupsRebuilt()
+
+        delete_readings(GlucoseTracking.objects.all())
+        self.assertEqual(self.snapshot(), {GlucoseDailyRollup: [], GlucoseHourlyRollup: []})
+
+    def hour_counts(self):
+        return dict(GlucoseHourlyRollup.objects.values_list('hour', 'count'))
+
+    @override_settings(TIME_ZONE='Europe/Berlin')
+    def test_hours_across_dst_end(self):
+        # Both readings are at 02:30 Berlin time on 2025-10-26, an hour apart
+        first, second = (store_glucose_reading(self.patient, {
+            "glucose_type": 'RBS', "glucose_value": 120.0, "timestamp": moment.replace(tzinfo=timezone.utc),
+        }) for moment in (datetime(2025, 10, 26, 0, 30), datetime(2025, 10, 26, 1, 30)))
+        expected = {datetime(2025, 10, 26, 0, 0, tzinfo=timezone.utc): 1,
+                    datetime(2025, 10, 26, 1, 0, tzinfo=timezone.utc): 1}
+        self.assertEqual(self.hour_counts(), expected)
+
+        first.glucose_value = 60.0
+        first.save()
+        self.assertEqual(self.hour_counts(), expected)
+        self.assertRollupsRebuilt()
+        self.assertEqual(self.hour_counts(), expected)
+
+        second.delete()
+        self.assertEqual(self.hour_counts(), {datetime(2025, 10, 26, 0, 0, tzinfo=timezone.utc): 1})
+        self.assertRollupsRebuilt()
+
+    def test_readings_delete_without_loading_rows(self):
+        self.assertTrue(Collector(using='default').can_fast_delete(GlucoseTracking.objects.all()))
+        self.assertEqual(self.post_bulk(50).status_code, 201)
+
+        # The patient's readings and rollups go in one DELETE each
+        with CaptureQueriesContext(connection) as queries:
+            self.patient.delete()
+        self.assertLess(len(queries), 20)
+        self.assertFalse(GlucoseTracking.objects.exists())
+        self.assertFalse(GlucoseDailyRollup.objects.exists())
+        self.assertFalse(GlucoseHourlyRollup.objects.exists())
+
+
+# The sync and async serving views side by side, for AsyncViewParityTests
+serving_view_names = ('predict_diabetes', 'alternative_medicines', 'drug_suggestions')
+urlpatterns = [
+    path(f'{prefix}/{name}/', getattr(module, name))
+    for prefix, module in (('sync', views), ('async', async_views))
+    for name in serving_view_names
+]
+
+
+@override_settings(ROOT_URLCONF='diabetescare.tests', PREDICT_CACHE_SIZE=0, PREDICT_BATCHING=False,
+                   INFERENCE_EXECUTOR=False)
+class AsyncViewParityTests(TestCase):
+    prediction = {'Pregnancies': 2, 'Glucose': 120, 'BloodPressure': 70, 'SkinThickness': 20, 'Insulin': 80,
+                  'BMI': 32.0, 'DiabetesPedigreeFunction': 0.5, 'Age': 40}
+
+    def setUp(self):
+        user = User.objects.create_user('patient', 'patient@example.com', 'password')
+        token = RefreshToken.for_user(user).access_token
+        self.client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def assertSameResponses(self, name, method, data=None, client=None, **extra):
+        client = client or self.client
+        responses = []
+        for prefix in ('sync', 'async'):
+            url = f'/{prefix}/{name}/'
+            if method == 'get':
+                response = client.get(url, data, **extra)
+            else:
+                body = data if isinstance(data, str) else json.dumps(data)
+                response = client.post(url, body, content_type='application/json', **extra)
+            responses.append(response)
+        sync_response, async_response = responses
+        self.assertEqual(sync_response.status_code, async_response.status_code, (name, method, data))
+        self.assertEqual(json.loads(sync_response.content), json.loads(async_response.content), (name, method, data))
+        for header in ('ETag', 'Cache-Control', 'Retry-After', 'WWW-Authenticate'):
+            self.assertEqual(sync_response.get(header), async_response.get(header), (name, header))
+        return sync_response
+
+    def test_prediction(self):
+        self.assertEqual(self.assertSameResponses('predict_diabetes', 'post', self.prediction).status_code, 200)
+        for data in ({**self.prediction, 'Glucose': 'high'}, {'Glucose': 120}, [self.prediction], '{not json'):
+            self.assertEqual(self.assertSameResponses('predict_diabetes', 'post', data).status_code, 400)
+
+    def test_alternative_medicines(self):
+        drug_name = alternative_medicine.suggest_drugs("met", 1, 0, False)[0]
+        for method in ('get', 'post'):
+            for data in ({'drug_name': drug_name}, {'drug_name': drug_name, 'k': 3}, {'drug_name': 'metformn', 'fuzzy': True},
+                         {'drug_name': 'no such drug'}):
+                self.assertSameResponses('alternative_medicines', method, data)
+            for data in ({}, {'drug_name': drug_name, 'k': 0}, {'drug_name': drug_name, 'fuzzy': 'maybe'}):
+                self.assertEqual(self.assertSameResponses('alternative_medicines', method, data).status_code, 400)
+        self.assertEqual(self.assertSameResponses('alternative_medicines', 'post', {'drug_name': 5}).status_code, 400)
+        self.assertEqual(self.assertSameResponses('alternative_medicines', 'post', '{not json').status_code, 400)
+
+    def test_drug_suggestions(self):
+        for method in ('get', 'post'):
+            for data in ({'query': 'met'}, {'query': 'met', 'limit': 2, 'offset': 1}, {'query': 'metfromin', 'fuzzy': True}):
+                self.assertEqual(self.assertSameResponses('drug_suggestions', method, data).status_code, 200)
+            for data in ({}, {'query': 'met', 'limit': 0}, {'query': 'met', 'offset': -1}, {'query': 'met', 'fuzzy': 'x'}):
+                self.assertEqual(self.assertSameResponses('drug_suggestions', method, data).status_code, 400)
+        self.assertEqual(self.assertSameResponses('drug_suggestions', 'post', {'query': ['met']}).status_code, 400)
+
+    def test_authentication_failures(self):
+        anonymous = Client()
+        invalid = Client(HTTP_AUTHORIZATION="Bearer not-a-token")
+        for client in (anonymous, invalid):
+            for name, method, data in (('predict_diabetes', 'post', self.prediction),
+                                       ('alternative_medicines', 'get', {'drug_name': 'x'}),
+                                       ('drug_suggestions', 'post', {'query': 'met'})):
+                response = self.assertSameResponses(name, method, data, client=client)
+                self.assertEqual(response.status_code, 401)
+
+
+@override_settings(ROOT_URLCONF='diabetescare.tests')
+class CatalogRevalidationTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('patient', 'patient@example.com', 'password')
+        token = RefreshToken.for_user(user).access_token
+        self.client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.drug_name = alternative_medicine.suggest_drugs("met", 1, 0, False)[0]
+
+    def check_revalidation(self, url, params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertTrue(response["Cache-Control"])
+
+        for if_none_match in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+            revalidated = self.client.get(url, params, HTTP_IF_NONE_MATCH=if_none_match)
+            self.assertEqual(revalidated.status_code, 304, (url, if_none_match))
+            self.assertEqual(revalidated.content, b"")
+            self.assertEqual(revalidated["ETag"], etag)
+
+        for if_none_match in ('"other"', 'W/"other"'):
+            self.assertEqual(self.client.get(url, params, HTTP_IF_NONE_MATCH=if_none_match).status_code, 200)
+        # Different parameters are a different resource
+        changed = self.client.get(url, {**params, 'fuzzy': True}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], etag)
+
+        # POST responses are never conditional or cacheable
+        posted = self.client.post(url, json.dumps(params), content_type='application/json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(posted.status_code, 200)
+        self.assertNotIn("ETag", posted)
+
+    def test_sync_and_async_views(self):
+        self.addCleanup(predict.registry.reload, "alternative_medicine")
+        for prefix in ('sync', 'async'):
+            for prerender in (False, True):
+                with override_settings(ALTERNATIVE_MEDICINE_PRERENDER=prerender):
+                    predict.registry.reload("alternative_medicine")
+                    self.check_revalidation(f'/{prefix}/alternative_medicines/', {'drug_name': self.drug_name})
+            self.check_revalidation(f'/{prefix}/drug_suggestions/', {'query': 'met'})
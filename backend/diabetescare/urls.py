@@ -1,14 +1,26 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Under ASGI, ASYNC_VIEWS serves the ML, catalog and glucose endpoints from async_views
+if settings.ASYNC_VIEWS:
+    from . import async_views as serving_views
+else:
+    serving_views = views
+
 urlpatterns = [
-    path('predict/', views.predict_diabetes, name='predict_diabetes'),
-    path('glucose/add/', views.add_glucose_reading, name='add_glucose_reading'),
-    path('glucose/list/', views.list_glucose_readings, name='add_glucose_reading'),
-    path('alternative-medicine/', views.alternative_medicines, name='alternative_medicines'),
-    path('drug-suggestions/', views.drug_suggestions, name='drug_suggestions'),
+    path('predict/', serving_views.predict_diabetes, name='predict_diabetes'),
+    path('predict/batch/', views.predict_diabetes_batch, name='predict_diabetes_batch'),
+    path('predict/metrics/', views.prediction_metrics, name='prediction_metrics'),
+    path('glucose/add/', serving_views.add_glucose_reading, name='add_glucose_reading'),
+    path('glucose/add/bulk/', views.add_glucose_readings_bulk, name='add_glucose_readings_bulk'),
+    path('glucose/list/', serving_views.list_glucose_readings, name='add_glucose_reading'),
+    path('glucose/statistics/', views.glucose_statistics, name='glucose_statistics'),
+    path('alternative-medicine/', serving_views.alternative_medicines, name='alternative_medicines'),
+    path('alternative-medicine/batch/', views.alternative_medicines_batch, name='alternative_medicines_batch'),
+    path('drug-suggestions/', serving_views.drug_suggestions, name='drug_suggestions'),
     path('upload-analysis/', views.upload_analysis, name='upload_analysis'),
     path('my-analysis/', views.my_analysis, name='my_analysis'),  
     path('delete-analysis/<int:analysis_id>/', views.delete_analysis, name='delete_analysis'),  
     path('add-comment-to-analysis/<int:analysis_id>/', views.add_comment_to_analysis, name='add_comment_to_analysis'),
-]
\ No newline at end of file
+]
@@ -1,14 +1,111 @@
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from .serializers import GlucoseTrackingSerializer, AnalysisImageSerializer
 from profiles.models import PatientProfile, DoctorPatientRelation
 from .models import GlucoseTracking, AnalysisImage
-from .import predict
+from .import predict, rollups
+from .executor import ExecutorSaturated, run_inference
+from .pagination import page_query, page_rows
+from .glucose_stats import glucose_statistics as compute_glucose_statistics
+import hashlib
 import json
+import math
 import os
 from django.contrib.auth.models import User
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Concat
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.http import parse_etags
+from datetime import timedelta, timezone as dt_timezone
+
+MEDICAL_HISTORY_HEADER = "Glucose Readings:"
+
+def format_reading(reading):
+    # Stored timestamps come back in UTC; a just-saved reading keeps the client's offset
+    timestamp = reading.timestamp
+    if timezone.is_aware(timestamp):
+        timestamp = timestamp.astimezone(dt_timezone.utc)
+    return (
+        f"- {reading.get_glucose_type_display()}: {reading.glucose_value} mg/dL "
+        f"on {timestamp.strftime('%Y-%m-%d %H:%M')}"
+    )
+
+def format_medical_history(readings):
+    medical_history_entry = f"{MEDICAL_HISTORY_HEADER}\n"
+    for reading in readings:
+        medical_history_entry += f"{format_reading(reading)}\n"
+    return medical_history_entry.strip()
+
+# medical_history with `readings` added at the end, keeping the newest
+# MEDICAL_HISTORY_MAX_READINGS lines (0 keeps all). None when the current text was not
+# generated from readings and has to be rebuilt.
+def append_medical_history(history, readings):
+    if not history or not history.startswith(MEDICAL_HISTORY_HEADER):
+        return None
+    lines = history.split("\n")[1:]
+    lines.extend(format_reading(reading) for reading in sorted(readings, key=lambda reading: reading.timestamp))
+    window = settings.MEDICAL_HISTORY_MAX_READINGS
+    if window:
+        lines = lines[-window:]
+    return "\n".join([MEDICAL_HISTORY_HEADER, *lines])
+
+# Readings the history is rebuilt from, newest first
+def medical_history_readings(patient):
+    readings = GlucoseTracking.objects.filter(patient=patient).order_by('-timestamp', '-id')
+    window = settings.MEDICAL_HISTORY_MAX_READINGS
+    return readings[:window] if window else readings
+
+# Readings stored before `readings` that are newer than the oldest of them. When there are
+# none, the new lines belong at the end of the history and can simply be appended.
+def readings_after(patient, readings):
+    oldest = min(reading.timestamp for reading in readings)
+    return (GlucoseTracking.objects.filter(patient=patient, timestamp__gt=oldest)
+            .exclude(pk__in=[reading.pk for reading in readings]))
+
+# Keep patient.medical_history in step with newly stored readings. The usual case, readings
+# newer than everything stored, only appends lines: without MEDICAL_HISTORY_MAX_READINGS the
+# database concatenates them onto the stored text, so an add costs the same however long
+# the history is; with it the text is read and cut to the window. Backdated readings rebuild
+# the history from the newest MEDICAL_HISTORY_MAX_READINGS rows. So do readings without a
+# primary key, which bulk_create leaves on databases that cannot return inserted rows.
+# Call it in the transaction that stored the readings: the profile row is locked first, so
+# concurrent adds for one patient take turns and each builds on the text the other saved.
+def update_medical_history(patient, readings):
+    with transaction.atomic():
+        profiles = PatientProfile.objects.filter(pk=patient.pk)
+        profiles.select_for_update().values_list('pk', flat=True).get()
+        appendable = all(reading.pk for reading in readings) and not readings_after(patient, readings).exists()
+
+        history = None
+        if appendable and settings.MEDICAL_HISTORY_MAX_READINGS:
+            history = append_medical_history(profiles.values_list('medical_history', flat=True).get(), readings)
+        elif appendable:
+            lines = "".join(f"\n{format_reading(reading)}" for reading in sorted(readings, key=lambda reading: reading.timestamp))
+            appended = profiles.filter(medical_history__startswith=MEDICAL_HISTORY_HEADER).update(
+                medical_history=Concat('medical_history', Value(lines))
+            )
+            if appended:
+                # Only the database has the new text; it is loaded again when next read
+                patient.__dict__.pop('medical_history', None)
+                return
+        if history is None:
+            history = format_medical_history(reversed(list(medical_history_readings(patient))))
+
+        profiles.update(medical_history=history)
+    patient.medical_history = history
+
+# Store one validated reading together with its medical history line
+def store_glucose_reading(patient, data):
+    with transaction.atomic():
+        glucose_reading = GlucoseTracking.objects.create(patient=patient, **data)
+        update_medical_history(patient, [glucose_reading])
+    return glucose_reading
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -22,24 +119,11 @@ def add_glucose_reading(request):
 
     serializer = GlucoseTrackingSerializer(data=request.data)
     if serializer.is_valid():
-        glucose_reading = serializer.save(patient=patient)
-
-        all_readings = GlucoseTracking.objects.filter(patient=patient).order_by('timestamp')
-
-        medical_history_entry = "Glucose Readings:\n"
-        for reading in all_readings:
-            reading_entry = (
-                f"- {reading.get_glucose_type_display()}: {reading.glucose_value} mg/dL "
-                f"on {reading.timestamp.strftime('%Y-%m-%d %H:%M')}"
-            )
-            medical_history_entry += f"{reading_entry}\n"
-
-        patient.medical_history = medical_history_entry.strip()
-        patient.save()
+        glucose_reading = store_glucose_reading(patient, serializer.validated_data)
 
         return Response({
             "message": "Glucose reading added successfully!",
-            "data": serializer.data
+            "data": GlucoseTrackingSerializer(glucose_reading).data
         }, status=status.HTTP_201_CREATED)
 
     return Response({
@@ -47,6 +131,61 @@ def add_glucose_reading(request):
         "errors": serializer.errors
     }, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def add_glucose_readings_bulk(request):
+    try:
+        patient = PatientProfile.objects.get(user=request.user)
+    except PatientProfile.DoesNotExist:
+        return Response({"error": "Only patients can add glucose readings."}, status=status.HTTP_403_FORBIDDEN)
+
+    data = request.data
+    rows = data.get('readings') if isinstance(data, dict) else data
+    if not isinstance(rows, list) or not rows:
+        return Response({"error": "Request body must be a non-empty list of readings or an object with a 'readings' list"}, status=status.HTTP_400_BAD_REQUEST)
+
+    max_readings = settings.GLUCOSE_BULK_MAX_READINGS
+    if len(rows) > max_readings:
+        return Response({"error": f"Too many readings. At most {max_readings} readings are allowed per request."}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Invalid rows are reported by position; the valid ones are still stored
+    serializer = GlucoseTrackingSerializer(data=rows, many=True)
+    if serializer.is_valid():
+        accepted, rejected = list(range(len(rows))), []
+        validated = serializer.validated_data
+    else:
+        accepted = [position for position, errors in enumerate(serializer.errors) if not errors]
+        rejected = [{"index": position, "errors": errors} for position, errors in enumerate(serializer.errors) if errors]
+        validated = []
+        if accepted:
+            valid_serializer = GlucoseTrackingSerializer(data=[rows[position] for position in accepted], many=True)
+            valid_serializer.is_valid(raise_exception=True)
+            validated = valid_serializer.validated_data
+
+    if not validated:
+        return Response({
+            "message": "Invalid data",
+            "accepted": [],
+            "rejected": rejected
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    # One INSERT batch and one medical history update for the whole request. bulk_create
+    # sends no post_save signals, so the rollups are updated here, once per bucket.
+    with transaction.atomic():
+        readings = GlucoseTracking.objects.bulk_create(
+            [GlucoseTracking(patient=patient, **reading) for reading in validated],
+            batch_size=settings.GLUCOSE_BULK_BATCH_SIZE
+        )
+        update_medical_history(patient, readings)
+        rollups.add_readings(readings)
+
+    return Response({
+        "message": f"{len(readings)} glucose readings added successfully!",
+        "accepted": accepted,
+        "rejected": rejected,
+        "data": GlucoseTrackingSerializer(readings, many=True).data
+    }, status=status.HTTP_201_CREATED)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_glucose_readings(request):
@@ -57,90 +196,354 @@ def list_glucose_readings(request):
     except PatientProfile.DoesNotExist:
         return Response({"error": "Only patients can access their glucose readings."}, status=status.HTTP_403_FORBIDDEN)
 
-    readings = GlucoseTracking.objects.filter(patient=patient).order_by('-timestamp')
+    readings, page, error = page_query(GlucoseTracking.objects.filter(patient=patient), 'timestamp', request.query_params)
+    if error:
+        return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+    readings, cursors = page_rows(list(readings), 'timestamp', page)
     serializer = GlucoseTrackingSerializer(readings, many=True)
 
     return Response({
         "message": "Glucose readings retrieved successfully!",
-        "data": serializer.data
+        "data": serializer.data,
+        **cursors
+    }, status=status.HTTP_200_OK)
+
+# Patient whose readings the request may read: the user's own profile, or with
+# ?patient_id= the profile of a patient linked to the requesting doctor
+def readable_patient(request):
+    user = request.user
+    patient_id = request.query_params.get('patient_id')
+    if patient_id is None:
+        try:
+            return PatientProfile.objects.get(user=user), None
+        except PatientProfile.DoesNotExist:
+            return None, Response({"error": "Only patients can access their glucose readings."}, status=status.HTTP_403_FORBIDDEN)
+
+    if not hasattr(user, 'doctorprofile'):
+        return None, Response({"error": "Only doctors can view patient glucose readings."}, status=status.HTTP_403_FORBIDDEN)
+    try:
+        patient = PatientProfile.objects.select_related('user').get(user_id=int(patient_id))
+    except (ValueError, PatientProfile.DoesNotExist):
+        return None, Response({"error": "Patient not found."}, status=status.HTTP_404_NOT_FOUND)
+    if not DoctorPatientRelation.objects.filter(doctor=user, patient=patient.user).exists():
+        return None, Response({"error": "This patient is not linked to you."}, status=status.HTTP_403_FORBIDDEN)
+    return patient, None
+
+def validate_statistics_window(data):
+    end = timezone.localdate()
+    if data.get('end'):
+        end = parse_date(data['end']) if isinstance(data['end'], str) else None
+        if end is None:
+            return None, None, "end must be a date (YYYY-MM-DD)"
+
+    start = end - timedelta(days=settings.GLUCOSE_STATISTICS_DEFAULT_DAYS - 1)
+    if data.get('start'):
+        start = parse_date(data['start']) if isinstance(data['start'], str) else None
+        if start is None:
+            return None, None, "start must be a date (YYYY-MM-DD)"
+
+    if not 0 <= (end - start).days < settings.GLUCOSE_STATISTICS_MAX_DAYS:
+        return None, None, f"start must be on or before end, at most {settings.GLUCOSE_STATISTICS_MAX_DAYS} days apart"
+    return start, end, None
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def glucose_statistics(request):
+    patient, error_response = readable_patient(request)
+    if error_response:
+        return error_response
+
+    try:
+        start, end, error = validate_statistics_window(request.query_params)
+    except ValueError:
+        error = "start and end must be valid dates (YYYY-MM-DD)"
+    if error:
+        return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+    statistics = compute_glucose_statistics(patient, start, end, settings.GLUCOSE_TARGET_LOW, settings.GLUCOSE_TARGET_HIGH)
+
+    return Response({
+        "message": "Glucose statistics retrieved successfully!",
+        "data": statistics
     }, status=status.HTTP_200_OK)
 
+def validate_prediction_input(data):
+    if not isinstance(data, dict):
+        return "Each entry must be a JSON object"
+
+    for field in predict.numerical_cols:
+        if field not in data:
+            return f"Missing required field: {field}"
+
+    for field in predict.numerical_cols:
+        try:
+            data[field] = float(data[field])
+        except (ValueError, TypeError):
+            return f"Invalid value for {field}. Must be a number."
+        if not math.isfinite(data[field]):
+            return f"Invalid value for {field}. Must be a number."
+
+    return None
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def predict_diabetes(request):
     try:
         data = json.loads(request.body)
         
-        required_fields = ['Pregnancies', 'Glucose', 'BloodPressure', 'SkinThickness', 
-                          'Insulin', 'BMI', 'DiabetesPedigreeFunction', 'Age']
-        for field in required_fields:
-            if field not in data:
-                return Response({"error": f"Missing required field: {field}"}, status=status.HTTP_400_BAD_REQUEST)
-        
-        for field in required_fields:
-            try:
-                data[field] = float(data[field])
-            except (ValueError, TypeError):
-                return Response({"error": f"Invalid value for {field}. Must be a number."}, status=status.HTTP_400_BAD_REQUEST)
+        error = validate_prediction_input(data)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
         
-        result = predict.predict_diabetes(data)
+        result = predict.serve_prediction(data)
         
         return Response(result, status=status.HTTP_200_OK)
     
     except json.JSONDecodeError:
         return Response({"error": "Invalid JSON format in request body"}, status=status.HTTP_400_BAD_REQUEST)
-    except predict.FileNotFoundError as e:
+    except ExecutorSaturated as e:
+        return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "1"})
+    except FileNotFoundError as e:
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     except Exception as e:
         return Response({"error": f"An error occurred: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def predict_diabetes_batch(request):
+    try:
+        data = json.loads(request.body)
+
+        rows = data.get('rows') if isinstance(data, dict) else data
+        if not isinstance(rows, list):
+            return Response({"error": "Request body must be a list of rows or an object with a 'rows' list"}, status=status.HTTP_400_BAD_REQUEST)
+
+        max_rows = settings.PREDICT_BATCH_MAX_ROWS
+        if len(rows) > max_rows:
+            return Response({"error": f"Too many rows. At most {max_rows} rows are allowed per request."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Invalid rows are reported in place; the rest are scored with one model call
+        results = [None] * len(rows)
+        valid_positions = []
+        for position, row in enumerate(rows):
+            error = validate_prediction_input(row)
+            if error:
+                results[position] = {"error": error}
+            else:
+                valid_positions.append(position)
+
+        predictions = run_inference(predict.predict_diabetes_batch, [rows[position] for position in valid_positions])
+        for position, prediction in zip(valid_positions, predictions):
+            results[position] = prediction
+
+        return Response({
+            "count": len(results),
+            "valid": len(valid_positions),
+            "results": results
+        }, status=status.HTTP_200_OK)
+
+    except json.JSONDecodeError:
+        return Response({"error": "Invalid JSON format in request body"}, status=status.HTTP_400_BAD_REQUEST)
+    except ExecutorSaturated as e:
+        return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "1"})
+    except Exception as e:
+        return Response({"error": f"An error occurred: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def prediction_metrics(request):
+    cache = predict.get_prediction_cache()
+
+    return Response({
+        "micro_batcher": predict.get_batcher().metrics() if settings.PREDICT_BATCHING else None,
+        "cache": cache.stats() if cache is not None else None
+    }, status=status.HTTP_200_OK)
     
 from . import alternative_medicine
 
-@api_view(['POST'])
+def validate_integer(value, name, minimum, maximum):
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    if not isinstance(value, int) or isinstance(value, bool) or not minimum <= value <= maximum:
+        return None, f"{name} must be an integer between {minimum} and {maximum}"
+    return value, None
+
+def validate_flag(value, name):
+    if isinstance(value, str) and value.strip().lower() in ("true", "false", "1", "0"):
+        value = value.strip().lower() in ("true", "1")
+    if not isinstance(value, bool):
+        return None, f"{name} must be a boolean"
+    return value, None
+
+def validate_recommendation_count(value):
+    return validate_integer(value, "k", 1, settings.ALTERNATIVE_MEDICINE_MAX_K)
+
+def validate_suggestion_page(data):
+    limit, error = validate_integer(data.get('limit', settings.DRUG_SUGGESTIONS_DEFAULT_LIMIT),
+                                    "limit", 1, settings.DRUG_SUGGESTIONS_MAX_LIMIT)
+    if error:
+        return None, None, error
+    offset, error = validate_integer(data.get('offset', 0), "offset", 0, settings.DRUG_SUGGESTIONS_MAX_OFFSET)
+    if error:
+        return None, None, error
+    return limit, offset, None
+
+# (drug name, k, fuzzy) of an alternative-medicine request, or an error message
+def validate_recommendation_request(data):
+    if 'drug_name' not in data:
+        return None, "Missing required field: drug_name"
+
+    drug_name = data['drug_name']
+    if not isinstance(drug_name, str):
+        return None, "drug_name must be a string"
+
+    k, error = validate_recommendation_count(data.get('k', alternative_medicine.DEFAULT_K))
+    if error:
+        return None, error
+
+    fuzzy, error = validate_flag(data.get('fuzzy', False), "fuzzy")
+    if error:
+        return None, error
+    return (drug_name, k, fuzzy), None
+
+# (query, limit, offset, fuzzy) of a drug-suggestions request, or an error message
+def validate_suggestion_request(data):
+    if 'query' not in data:
+        return None, "Missing required field: query"
+
+    query = data['query']
+    if not isinstance(query, str):
+        return None, "query must be a string"
+
+    limit, offset, error = validate_suggestion_page(data)
+    if error:
+        return None, error
+
+    fuzzy, error = validate_flag(data.get('fuzzy', False), "fuzzy")
+    if error:
+        return None, error
+    return (query, limit, offset, fuzzy), None
+
+# If-None-Match uses the weak comparison (RFC 9110 13.1.2): W/"x" matches "x", which is
+# what a compressing proxy hands back for the ETags it weakened
+def not_modified(request, etag):
+    if_none_match = request.headers.get('If-None-Match')
+    if not if_none_match:
+        return False
+    etags = parse_etags(if_none_match)
+    return '*' in etags or etag.removeprefix('W/') in {tag.removeprefix('W/') for tag in etags}
+
+# Headers of cacheable GET catalog responses. The ETag covers the catalog version and the
+# validated parameters, so a revalidation is answered before any catalog work is done.
+def catalog_cache_headers(*parameters):
+    digest = hashlib.sha256(json.dumps(parameters, ensure_ascii=False).encode()).hexdigest()[:16]
+    return {"ETag": f'"{alternative_medicine.catalog_version()}-{digest}"', "Cache-Control": settings.CATALOG_CACHE_CONTROL}
+
+# Already encoded JSON body. A GET carries the cache headers and becomes a 304 when the
+# client's If-None-Match still matches the ETag; POST responses are not cacheable.
+def prerendered_response(request, body, headers):
+    if request.method != 'GET':
+        return HttpResponse(body, content_type="application/json")
+    if not_modified(request, headers["ETag"]):
+        return HttpResponseNotModified(headers=headers)
+    return HttpResponse(body, content_type="application/json", headers=headers)
+
+@api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def alternative_medicines(request):
     try:
-        data = json.loads(request.body)
+        data = request.query_params if request.method == 'GET' else json.loads(request.body)
+
+        parameters, error = validate_recommendation_request(data)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        drug_name, k, fuzzy = parameters
+
+        headers = None
+        if request.method == 'GET':
+            headers = catalog_cache_headers("alternative-medicine", drug_name, k, fuzzy)
+            if not_modified(request, headers["ETag"]):
+                return HttpResponseNotModified(headers=headers)
+
+        prerendered = alternative_medicine.prerendered_recommendation(drug_name, k)
+        if prerendered:
+            return prerendered_response(request, prerendered, headers)
         
-        if 'drug_name' not in data:
-            return Response({"error": "Missing required field: drug_name"}, status=status.HTTP_400_BAD_REQUEST)
+        result = run_inference(alternative_medicine.recommend_info, drug_name, k, fuzzy)
         
-        drug_name = data['drug_name']
-        if not isinstance(drug_name, str):
-            return Response({"error": "drug_name must be a string"}, status=status.HTTP_400_BAD_REQUEST)
-        
-        result = alternative_medicine.recommend_info(drug_name)
-        
-        return Response(result, status=status.HTTP_200_OK)
+        return Response(result, status=status.HTTP_200_OK, headers=headers)
     
     except json.JSONDecodeError:
         return Response({"error": "Invalid JSON format in request body"}, status=status.HTTP_400_BAD_REQUEST)
-    except alternative_medicine.FileNotFoundError as e:
+    except ExecutorSaturated as e:
+        return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "1"})
+    except FileNotFoundError as e:
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     except Exception as e:
         return Response({"error": f"An error occurred: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-def drug_suggestions(request):
+def alternative_medicines_batch(request):
     try:
         data = json.loads(request.body)
-        
-        if 'query' not in data:
-            return Response({"error": "Missing required field: query"}, status=status.HTTP_400_BAD_REQUEST)
-        
-        query = data['query']
-        if not isinstance(query, str):
-            return Response({"error": "query must be a string"}, status=status.HTTP_400_BAD_REQUEST)
+
+        drug_names = data.get('drug_names') if isinstance(data, dict) else None
+        if not isinstance(drug_names, list) or not drug_names:
+            return Response({"error": "Request body must be an object with a non-empty 'drug_names' list"}, status=status.HTTP_400_BAD_REQUEST)
+
+        max_drugs = settings.ALTERNATIVE_MEDICINE_BATCH_MAX_DRUGS
+        if len(drug_names) > max_drugs:
+            return Response({"error": f"Too many drugs. At most {max_drugs} drug names are allowed per request."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not all(isinstance(drug_name, str) for drug_name in drug_names):
+            return Response({"error": "drug_names must be a list of strings"}, status=status.HTTP_400_BAD_REQUEST)
+
+        k, error = validate_recommendation_count(data.get('k', alternative_medicine.DEFAULT_K))
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        merged, error = validate_flag(data.get('merged', False), "merged")
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        fuzzy, error = validate_flag(data.get('fuzzy', False), "fuzzy")
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = run_inference(alternative_medicine.recommend_batch, drug_names, k, merged, fuzzy)
+
+        return Response(result, status=status.HTTP_200_OK)
+
+    except json.JSONDecodeError:
+        return Response({"error": "Invalid JSON format in request body"}, status=status.HTTP_400_BAD_REQUEST)
+    except ExecutorSaturated as e:
+        return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "1"})
+    except FileNotFoundError as e:
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    except Exception as e:
+        return Response({"error": f"An error occurred: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def drug_suggestions(request):
+    try:
+        data = request.query_params if request.method == 'GET' else json.loads(request.body)
+
+        parameters, error = validate_suggestion_request(data)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        query, limit, offset, fuzzy = parameters
     
-        drug_names = alternative_medicine.new_data['Drug Name'].tolist()
-        
-        suggestions = [
-            drug for drug in drug_names
-            if drug.lower().startswith(query.lower())
-        ]
+        headers = None
+        if request.method == 'GET':
+            headers = catalog_cache_headers("drug-suggestions", query, limit, offset, fuzzy)
+            if not_modified(request, headers["ETag"]):
+                return HttpResponseNotModified(headers=headers)
+    
+        suggestions = alternative_medicine.suggest_drugs(query, limit, offset, fuzzy)
         
-        return Response(suggestions, status=status.HTTP_200_OK)
+        return Response(suggestions, status=status.HTTP_200_OK, headers=headers)
     
     except json.JSONDecodeError:
         return Response({"error": "Invalid JSON format in request body"}, status=status.HTTP_400_BAD_REQUEST)
@@ -186,12 +589,16 @@ def my_analysis(request):
     except PatientProfile.DoesNotExist:
         return Response({"error": "Only patients can view their analysis."}, status=status.HTTP_403_FORBIDDEN)
 
-    analysis = AnalysisImage.objects.filter(patient=patient).order_by('-uploaded_at')
+    analysis, page, error = page_query(AnalysisImage.objects.filter(patient=patient), 'uploaded_at', request.query_params)
+    if error:
+        return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+    analysis, cursors = page_rows(list(analysis), 'uploaded_at', page)
     serializer = AnalysisImageSerializer(analysis, many=True)
 
     return Response({
         "message": "Your analysis retrieved successfully!",
-        "data": serializer.data
+        "data": serializer.data,
+        **cursors
     }, status=status.HTTP_200_OK)
 
 @api_view(['DELETE'])
@@ -11,6 +11,7 @@ from .serializers import (
 )
 from .models import DoctorPatientRelation, DoctorProfile, PatientProfile
 from diabetescare.models import AnalysisImage
+from diabetescare.pagination import page_query, page_rows
 from diabetescare.serializers import AnalysisImageSerializer
 
 class GetProfile(APIView):
@@ -196,9 +197,12 @@ class PatientAnalysis(APIView):
             if not DoctorPatientRelation.objects.filter(doctor=user, patient=patient).exists():
                 return Response({"error": "This patient is not linked to you"}, status=status.HTTP_403_FORBIDDEN)
 
-            analysis = AnalysisImage.objects.filter(patient=patient.patientprofile).order_by('-uploaded_at')
+            analysis, page, error = page_query(AnalysisImage.objects.filter(patient=patient.patientprofile), 'uploaded_at', request.query_params)
+            if error:
+                return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+            analysis, cursors = page_rows(list(analysis), 'uploaded_at', page)
             serializer = AnalysisImageSerializer(analysis, many=True)
-            return Response({"message": "Patient analysis retrieved successfully!", "data": serializer.data})
+            return Response({"message": "Patient analysis retrieved successfully!", "data": serializer.data, **cursors})
 
         except User.DoesNotExist:
             return Response({"error": "Patient not found"}, status=status.HTTP_404_NOT_FOUND)
@@ -25,6 +25,7 @@ class GlucoseTrackingScreenState extends State<GlucoseTrackingScreen> {
   final TextEditingController _descriptionController = TextEditingController();
   String _selectedReadingType = 'صائم';
   List<Map<String, dynamic>> glucoseReadings = [];
+  String? _glucoseNext;
   DateTime? _selectedDateTime;
   final HttpService _httpService = HttpService();
   String? _token;
@@ -59,7 +60,7 @@ class GlucoseTrackingScreenState extends State<GlucoseTrackingScreen> {
     try {
       final response = await _httpService.makeRequest(
         method: 'GET',
-        url: Uri.parse('https://diabetesmanagement.pythonanywhere.com/api/glucose/list/'),
+        url: _httpService.pageUrl('https://diabetesmanagement.pythonanywhere.com/api/glucose/list/'),
         headers: {'Content-Type': 'application/json'},
       );
 
@@ -68,6 +69,7 @@ class GlucoseTrackingScreenState extends State<GlucoseTrackingScreen> {
         if (responseData['data'] != null) {
           setState(() {
             glucoseReadings = List<Map<String, dynamic>>.from(responseData['data']);
+            _glucoseNext = responseData['next'];
           });
         }
       } else {
@@ -405,7 +407,7 @@ class GlucoseTrackingScreenState extends State<GlucoseTrackingScreen> {
               Navigator.push(
                 context,
                 MaterialPageRoute(
-                  builder: (context) => PreviousReadingsScreen(readings: glucoseReadings),
+                  builder: (context) => PreviousReadingsScreen(readings: glucoseReadings, next: _glucoseNext),
                 ),
               );
             },
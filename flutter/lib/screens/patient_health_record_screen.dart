@@ -22,6 +22,8 @@ class PatientHealthRecordScreenState extends State<PatientHealthRecordScreen> wi
   bool _isLoading = true;
   String? _token;
   final HttpService _httpService = HttpService();
+  String? _analysisNext;
+  bool _isLoadingMoreAnalysis = false;
 
   @override
   bool get wantKeepAlive => true;
@@ -92,6 +94,7 @@ class PatientHealthRecordScreenState extends State<PatientHealthRecordScreen> wi
         // Fetch patient analysis
         debugPrint('Fetching patient analysis');
         List<Map<String, dynamic>> analysisData = [];
+        _analysisNext = null;
         try {
           analysisData = await _fetchPatientAnalysis(widget.patientId);
         } catch (e) {
@@ -117,12 +120,14 @@ class PatientHealthRecordScreenState extends State<PatientHealthRecordScreen> wi
     }
   }
 
-  Future<List<Map<String, dynamic>>> _fetchPatientAnalysis(int patientId) async {
+  // صفحة من تحاليل المريض، الأحدث أولاً. before هو مؤشر الصفحة التالية (null للصفحة الأولى)
+  Future<List<Map<String, dynamic>>> _fetchPatientAnalysis(int patientId, {String? before}) async {
     debugPrint('Fetching analysis for patient ID: $patientId');
     try {
       final response = await HttpService().makeRequest(
         method: 'GET',
-        url: Uri.parse('https://diabetesmanagement.pythonanywhere.com/api/patient-analysis/$patientId/'),
+        url: _httpService.pageUrl('https://diabetesmanagement.pythonanywhere.com/api/patient-analysis/$patientId/',
+            before: before),
         headers: {'Content-Type': 'application/json'},
       ).timeout(const Duration(seconds: 10), onTimeout: () {
         throw Exception('تجاوز مهلة جلب تحاليل المريض');
@@ -137,6 +142,7 @@ class PatientHealthRecordScreenState extends State<PatientHealthRecordScreen> wi
 
       if (response.statusCode == 200) {
         final responseData = jsonDecode(utf8.decode(response.bodyBytes));
+        _analysisNext = responseData['next'];
         return List<Map<String, dynamic>>.from(responseData['data']);
       } else {
         final responseData = jsonDecode(response.body);
@@ -148,6 +154,28 @@ class PatientHealthRecordScreenState extends State<PatientHealthRecordScreen> wi
     }
   }
 
+  Future<void> _loadMoreAnalysis() async {
+    if (_analysisNext == null || _isLoadingMoreAnalysis) return;
+    setState(() {
+      _isLoadingMoreAnalysis = true;
+    });
+
+    try {
+      final page = await _fetchPatientAnalysis(widget.patientId, before: _analysisNext);
+      setState(() {
+        _healthRecord!['analysis'] = [..._healthRecord!['analysis'], ...page];
+      });
+    } catch (e) {
+      _showSnackBar('$e', Colors.red);
+    } finally {
+      if (mounted) {
+        setState(() {
+          _isLoadingMoreAnalysis = false;
+        });
+      }
+    }
+  }
+
   Future<void> _addCommentToAnalysis(int analysisId, String comment) async {
     if (_token == null) {
       _showSnackBar('لم يتم العثور على رمز الوصول! يرجى تسجيل الدخول.', Colors.red);
@@ -746,6 +774,22 @@ class PatientHealthRecordScreenState extends State<PatientHealthRecordScreen> wi
                                     ),
                                   ),
                                 ),
+                          if (_analysisNext != null)
+                            Center(
+                              child: _isLoadingMoreAnalysis
+                                  ? const Padding(
+                                      padding: EdgeInsets.all(12.0),
+                                      child: CircularProgressIndicator(),
+                                    )
+                                  : TextButton.icon(
+                                      onPressed: _loadMoreAnalysis,
+                                      icon: const Icon(Icons.expand_more, color: Colors.teal),
+                                      label: const Text(
+                                        'عرض المزيد',
+                                        style: TextStyle(color: Colors.teal, fontWeight: FontWeight.bold),
+                                      ),
+                                    ),
+                            ),
                         ],
                       ),
       ),
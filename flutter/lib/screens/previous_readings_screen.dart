@@ -1,11 +1,64 @@
 import 'package:flutter/material.dart';
 import 'package:intl/intl.dart';
 import 'package:diabetes_management/config/theme.dart';
+import 'package:diabetes_management/services/http_service.dart';
+import 'dart:convert';
 
-class PreviousReadingsScreen extends StatelessWidget {
+class PreviousReadingsScreen extends StatefulWidget {
+  // الصفحة الأولى من القراءات ومؤشر الصفحة التالية (null إذا لم توجد قراءات أقدم)
   final List<Map<String, dynamic>> readings;
+  final String? next;
 
-  const PreviousReadingsScreen({super.key, required this.readings});
+  const PreviousReadingsScreen({super.key, required this.readings, this.next});
+
+  @override
+  PreviousReadingsScreenState createState() => PreviousReadingsScreenState();
+}
+
+class PreviousReadingsScreenState extends State<PreviousReadingsScreen> {
+  final HttpService _httpService = HttpService();
+  late List<Map<String, dynamic>> readings = List.of(widget.readings);
+  late String? _next = widget.next;
+  bool _isLoadingMore = false;
+
+  Future<void> _loadMore() async {
+    if (_next == null || _isLoadingMore) return;
+    setState(() {
+      _isLoadingMore = true;
+    });
+
+    try {
+      final response = await _httpService.makeRequest(
+        method: 'GET',
+        url: _httpService.pageUrl('https://diabetesmanagement.pythonanywhere.com/api/glucose/list/', before: _next),
+        headers: {'Content-Type': 'application/json'},
+      );
+
+      if (response != null && response.statusCode == 200) {
+        final responseData = jsonDecode(response.body);
+        setState(() {
+          readings = [...readings, ...List<Map<String, dynamic>>.from(responseData['data'] ?? [])];
+          _next = responseData['next'];
+        });
+      } else if (mounted) {
+        ScaffoldMessenger.of(context).showSnackBar(
+          const SnackBar(content: Text('فشل في جلب القراءات!'), backgroundColor: Colors.red),
+        );
+      }
+    } catch (e) {
+      if (mounted) {
+        ScaffoldMessenger.of(context).showSnackBar(
+          SnackBar(content: Text('فشل في جلب القراءات: $e'), backgroundColor: Colors.red),
+        );
+      }
+    } finally {
+      if (mounted) {
+        setState(() {
+          _isLoadingMore = false;
+        });
+      }
+    }
+  }
 
   @override
   Widget build(BuildContext context) {
@@ -47,61 +100,78 @@ class PreviousReadingsScreen extends StatelessWidget {
                 child: Align(
                   alignment: Alignment.topCenter, // تمركز أفقي ووضع الجدول في الأعلى
                   child: SingleChildScrollView(
-                    scrollDirection: Axis.horizontal,
-                    child: DataTable(
-                      columnSpacing: 20,
-                      headingRowColor: WidgetStateProperty.all(Colors.teal.shade100),
-                      dataRowColor: WidgetStateProperty.all(Colors.white),
-                      border: TableBorder.all(color: Colors.black, width: 1),
-                      columns: const [
-                        DataColumn(
-                          label: Text(
-                            'رقم',
-                            style: TextStyle(fontWeight: FontWeight.bold),
-                          ),
-                        ),
-                        DataColumn(
-                          label: Text(
-                            'نوع القياس',
-                            style: TextStyle(fontWeight: FontWeight.bold),
-                          ),
-                        ),
-                        DataColumn(
-                          label: Text(
-                            'مستوى السكر',
-                            style: TextStyle(fontWeight: FontWeight.bold),
+                    child: Column(
+                      children: [
+                        SingleChildScrollView(
+                          scrollDirection: Axis.horizontal,
+                          child: DataTable(
+                            columnSpacing: 20,
+                            headingRowColor: WidgetStateProperty.all(Colors.teal.shade100),
+                            dataRowColor: WidgetStateProperty.all(Colors.white),
+                            border: TableBorder.all(color: Colors.black, width: 1),
+                            columns: const [
+                              DataColumn(
+                                label: Text(
+                                  'رقم',
+                                  style: TextStyle(fontWeight: FontWeight.bold),
+                                ),
+                              ),
+                              DataColumn(
+                                label: Text(
+                                  'نوع القياس',
+                                  style: TextStyle(fontWeight: FontWeight.bold),
+                                ),
+                              ),
+                              DataColumn(
+                                label: Text(
+                                  'مستوى السكر',
+                                  style: TextStyle(fontWeight: FontWeight.bold),
+                                ),
+                              ),
+                              DataColumn(
+                                label: Text(
+                                  'التوقيت ',
+                                  style: TextStyle(fontWeight: FontWeight.bold),
+                                ),
+                              ),
+                            ],
+                            rows: readings.asMap().entries.map((entry) {
+                              int index = entry.key + 1;
+                              Map<String, dynamic> reading = entry.value;
+                              final DateTime parsedDateTime = DateTime.parse(reading['timestamp']);
+                              final String formattedDate = DateFormat('yyyy-MM-dd').format(parsedDateTime);
+                              final String formattedTime = DateFormat('h:mm a')
+                                  .format(parsedDateTime)
+                                  .replaceAll('AM', 'صباحًا')
+                                  .replaceAll('PM', 'مساءً');
+
+                              return DataRow(cells: [
+                                DataCell(Text(index.toString())),
+                                DataCell(Text(readingTypeReverseMap[reading['glucose_type']] ?? 'غير معروف')),
+                                DataCell(Text('${reading['glucose_value']} mg/dL')),
+                                DataCell(Column(
+                                  crossAxisAlignment: CrossAxisAlignment.start,
+                                  children: [
+                                    Text(formattedDate),
+                                    Text(formattedTime),
+                                  ],
+                                )),
+                              ]);
+                            }).toList(),
                           ),
                         ),
-                        DataColumn(
-                          label: Text(
-                            'التوقيت ',
-                            style: TextStyle(fontWeight: FontWeight.bold),
+                        if (_next != null)
+                          Padding(
+                            padding: const EdgeInsets.symmetric(vertical: 12.0),
+                            child: _isLoadingMore
+                                ? const CircularProgressIndicator()
+                                : TextButton.icon(
+                                    onPressed: _loadMore,
+                                    icon: const Icon(Icons.expand_more),
+                                    label: const Text('عرض المزيد'),
+                                  ),
                           ),
-                        ),
                       ],
-                      rows: readings.asMap().entries.map((entry) {
-                        int index = entry.key + 1;
-                        Map<String, dynamic> reading = entry.value;
-                        final DateTime parsedDateTime = DateTime.parse(reading['timestamp']);
-                        final String formattedDate = DateFormat('yyyy-MM-dd').format(parsedDateTime);
-                        final String formattedTime = DateFormat('h:mm a')
-                            .format(parsedDateTime)
-                            .replaceAll('AM', 'صباحًا')
-                            .replaceAll('PM', 'مساءً');
-
-                        return DataRow(cells: [
-                          DataCell(Text(index.toString())),
-                          DataCell(Text(readingTypeReverseMap[reading['glucose_type']] ?? 'غير معروف')),
-                          DataCell(Text('${reading['glucose_value']} mg/dL')),
-                          DataCell(Column(
-                            crossAxisAlignment: CrossAxisAlignment.start,
-                            children: [
-                              Text(formattedDate),
-                              Text(formattedTime),
-                            ],
-                          )),
-                        ]);
-                      }).toList(),
                     ),
                   ),
                 ),
@@ -22,6 +22,8 @@ class ProfileAndSettingsScreenState extends State<ProfileScreen> with RouteAware
   Map<String, dynamic>? _linkedDoctor;
   List<Map<String, dynamic>> _glucoseReadings = [];
   List<Map<String, dynamic>> _analysisImages = [];
+  String? _glucoseNext;
+  String? _analysisNext;
   String? _token;
   final HttpService _httpService = HttpService();
 
@@ -196,13 +198,14 @@ class ProfileAndSettingsScreenState extends State<ProfileScreen> with RouteAware
     }
   }
 
-  Future<void> _fetchGlucoseReadings() async {
+  Future<void> _fetchGlucoseReadings({bool loadMore = false}) async {
     if (_token == null) return;
 
     try {
       final response = await _httpService.makeRequest(
         method: 'GET',
-        url: Uri.parse('https://diabetesmanagement.pythonanywhere.com/api/glucose/list/'),
+        url: _httpService.pageUrl('https://diabetesmanagement.pythonanywhere.com/api/glucose/list/',
+            before: loadMore ? _glucoseNext : null),
         headers: {
           'Content-Type': 'application/json; charset=utf-8',
           'Accept': 'application/json; charset=utf-8',
@@ -212,8 +215,10 @@ class ProfileAndSettingsScreenState extends State<ProfileScreen> with RouteAware
       if (response != null && response.statusCode == 200) {
         final responseData = jsonDecode(utf8.decode(response.bodyBytes));
         if (responseData['data'] != null) {
+          final page = List<Map<String, dynamic>>.from(responseData['data']);
           setState(() {
-            _glucoseReadings = List<Map<String, dynamic>>.from(responseData['data']);
+            _glucoseReadings = loadMore ? [..._glucoseReadings, ...page] : page;
+            _glucoseNext = responseData['next'];
           });
         }
       } else {
@@ -224,13 +229,14 @@ class ProfileAndSettingsScreenState extends State<ProfileScreen> with RouteAware
     }
   }
 
-  Future<void> _fetchAnalysisImages() async {
+  Future<void> _fetchAnalysisImages({bool loadMore = false}) async {
     if (_token == null) return;
 
     try {
       final response = await _httpService.makeRequest(
         method: 'GET',
-        url: Uri.parse('https://diabetesmanagement.pythonanywhere.com/api/my-analysis/'),
+        url: _httpService.pageUrl('https://diabetesmanagement.pythonanywhere.com/api/my-analysis/',
+            before: loadMore ? _analysisNext : null),
         headers: {
           'Content-Type': 'application/json; charset=utf-8',
           'Accept': 'application/json; charset=utf-8',
@@ -240,9 +246,11 @@ class ProfileAndSettingsScreenState extends State<ProfileScreen> with RouteAware
       if (response != null && response.statusCode == 200) {
         final responseData = jsonDecode(utf8.decode(response.bodyBytes));
         if (responseData['data'] != null) {
+          final page = List<Map<String, dynamic>>.from(responseData['data']);
           setState(() {
-            _analysisImages = List<Map<String, dynamic>>.from(responseData['data']);
-            for (var image in _analysisImages) {
+            _analysisImages = loadMore ? [..._analysisImages, ...page] : page;
+            _analysisNext = responseData['next'];
+            for (var image in page) {
               debugPrint('Description: ${image['description']}');
             }
           });
@@ -348,6 +356,20 @@ class ProfileAndSettingsScreenState extends State<ProfileScreen> with RouteAware
     );
   }
 
+  // زر لجلب الصفحة التالية (الأقدم) من القائمة
+  Widget _buildLoadMoreButton(VoidCallback onPressed) {
+    return Center(
+      child: TextButton.icon(
+        onPressed: onPressed,
+        icon: const Icon(Icons.expand_more, color: Colors.teal),
+        label: const Text(
+          'عرض المزيد',
+          style: TextStyle(color: Colors.teal, fontFamily: 'Cairo', fontWeight: FontWeight.bold),
+        ),
+      ),
+    );
+  }
+
   List<Map<String, dynamic>> _parseGlucoseReadings() {
     const glucoseTypeMap = {
       'FBS': 'صائم',
@@ -660,6 +682,8 @@ class ProfileAndSettingsScreenState extends State<ProfileScreen> with RouteAware
                                               ),
                                             ),
                                           ),
+                                    if (_glucoseNext != null)
+                                      _buildLoadMoreButton(() => _fetchGlucoseReadings(loadMore: true)),
                                     const SizedBox(height: 16),
                                     Divider(
                                       color: Colors.grey[300],
@@ -810,6 +834,8 @@ class ProfileAndSettingsScreenState extends State<ProfileScreen> with RouteAware
                                               );
                                             },
                                           ),
+                                    if (_analysisNext != null)
+                                      _buildLoadMoreButton(() => _fetchAnalysisImages(loadMore: true)),
                                   ],
                                 ),
                               ),
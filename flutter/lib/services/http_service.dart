@@ -18,6 +18,20 @@ class HttpService {
 
   http.Client get client => _client;
 
+  // عدد العناصر التي تُطلب في كل صفحة من قوائم القياسات والتحاليل
+  static const int pageSize = 50;
+
+  // رابط صفحة من قائمة مرتبة من الأحدث إلى الأقدم. before هو قيمة next من الصفحة السابقة
+  // (null للصفحة الأولى)، ويعيد الخادم next = null عندما لا توجد عناصر أقدم.
+  Uri pageUrl(String url, {String? before}) {
+    final Uri uri = Uri.parse(url);
+    return uri.replace(queryParameters: {
+      ...uri.queryParameters,
+      'limit': '$pageSize',
+      if (before != null) 'before': before,
+    });
+  }
+
   void setTokens(String accessToken, String refreshToken) {
     _accessToken = accessToken;
     _refreshToken = refreshToken;